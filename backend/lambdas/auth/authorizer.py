@@ -4,11 +4,40 @@ Validates JWT tokens and returns IAM policy
 """
 
 import json
-import jwt
 import os
-import re
+import logging
+import time
+import hashlib
+import hmac
+import base64
+
+# Lambda installs a root handler; LOG_LEVEL=DEBUG turns on verbose output
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'WARNING'))
 
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key')
+_JWT_SECRET_BYTES = JWT_SECRET.encode()
+
+# Verified tokens are cached per warm container so repeat calls skip verification
+TOKEN_CACHE_MAX_SIZE = 1024
+TOKEN_EXPIRY_MARGIN_SECONDS = 5
+_TOKEN_CACHE = {}  # token fingerprint -> (exp, context)
+
+# Per-container key for fingerprints so cache keys cannot be precomputed
+_CACHE_KEY_SALT = os.urandom(16)
+
+
+def _token_fingerprint(token):
+    """Short keyed cache key so raw tokens are never held in memory"""
+    # blake2b is only a lookup key here - signatures still use HMAC-SHA256
+    return hashlib.blake2b(token.encode(), digest_size=16, key=_CACHE_KEY_SALT).digest()
+
+
+def _cache_token(cache_key, exp, context):
+    """Store verified token context, evicting the oldest entry when full"""
+    if len(_TOKEN_CACHE) >= TOKEN_CACHE_MAX_SIZE:
+        del _TOKEN_CACHE[next(iter(_TOKEN_CACHE))]
+    _TOKEN_CACHE[cache_key] = (exp, context)
 
 
 def lambda_handler(event, context):
@@ -16,72 +45,170 @@ def lambda_handler(event, context):
     API Gateway Lambda Authorizer
     Validates JWT token and returns policy
     """
-    print(f"Authorizer invoked: {json.dumps(event)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Authorizer invoked: %s", json.dumps(event))
     
     # Extract token from Authorization header
     token = extract_token(event)
     
     if not token:
-        print("No token found in request")
+        logger.info("No token found in request")
         raise Exception('Unauthorized')
     
+    user_context, error = authorize_token(token)
+    
+    # Rejected tokens get an explicit Deny - cheaper than raising, and API
+    # Gateway still answers 403 without invoking the backend
+    if error:
+        logger.info("Token rejected: %s", error)
+        return generate_policy('anonymous', 'Deny', event['methodArn'])
+    
+    logger.info("Token validated for user: %s", user_context['user_id'])
+    
+    # Generate IAM policy
+    policy = generate_policy(user_context['user_id'], 'Allow', event['methodArn'])
+    policy['context'] = user_context
+    return policy
+
+
+def bulk_verify_handler(event, context):
+    """
+    Verify a batch of tokens in one invocation
+    
+    Lets a fan-in proxy amortize one Lambda invocation over many tokens
+    instead of paying one authorizer call each. The per-request authorizer
+    above stays the default path.
+    
+    Expected event:
+    {
+        "tokens": ["eyJ...", "eyJ..."]
+    }
+    
+    Returns:
+    {
+        "results": [
+            {"valid": true, "user_id": "...", "email": "..."},
+            {"valid": false, "error": "expired"}
+        ]
+    }
+    """
+    results = []
+    for token in event.get('tokens') or []:
+        if not token:
+            user_context, error = None, 'missing token'
+        elif not isinstance(token, str):
+            user_context, error = None, 'malformed token'
+        else:
+            user_context, error = authorize_token(token)
+        if error:
+            results.append({'valid': False, 'error': error})
+        else:
+            results.append({'valid': True, **user_context})
+    
+    logger.info("Bulk verified %d tokens", len(results))
+    return {'results': results}
+
+
+def authorize_token(token):
+    """
+    Resolve a token to its user context, reusing cached verifications
+    
+    Args:
+        token: Encoded JWT string
+    
+    Returns:
+        Tuple of (context, error) where context holds string user_id and email
+    """
+    # Reuse a previous verification of the same token while it is still valid
+    cache_key = _token_fingerprint(token)
+    cached = _TOKEN_CACHE.get(cache_key)
+    if cached and cached[0] > time.time() + TOKEN_EXPIRY_MARGIN_SECONDS:
+        return dict(cached[1]), None
+    
+    payload, error = verify_token(token)
+    if error:
+        return None, error
+    
+    user_id = payload.get('user_id')
+    if not user_id:
+        return None, 'missing user_id'
+    
+    # API Gateway only accepts string/number/bool context values
+    user_context = {
+        'user_id': str(user_id),
+        'email': str(payload.get('email', ''))
+    }
+    
+    if payload.get('exp'):
+        _cache_token(cache_key, payload['exp'], dict(user_context))
+    
+    return user_context, None
+
+
+def _b64url_decode(segment):
+    """Decode an unpadded base64url JWT segment"""
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+def verify_token(token):
+    """
+    Verify an HS256 JWT without going through PyJWT
+    
+    Args:
+        token: Encoded JWT string
+    
+    Returns:
+        Tuple of (payload, error) where error is None, 'expired' or a reason string
+    """
+    parts = token.split('.')
+    if len(parts) != 3:
+        return None, 'malformed token'
+    header_segment, payload_segment, signature_segment = parts
+    
     try:
-        # Validate JWT token
-        payload = jwt.decode(
-            token,
-            JWT_SECRET,
-            algorithms=['HS256']
-        )
-        
-        user_id = payload.get('user_id')
-        
-        if not user_id:
-            print("Token missing user_id")
-            raise Exception('Unauthorized')
+        header = json.loads(_b64url_decode(header_segment))
+        if header.get('alg') != 'HS256':
+            return None, 'unsupported algorithm'
         
-        print(f"Token validated for user: {user_id}")
+        signing_input = f"{header_segment}.{payload_segment}".encode()
+        expected = hmac.new(_JWT_SECRET_BYTES, signing_input, hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature_segment)):
+            return None, 'signature verification failed'
         
-        # Generate IAM policy
-        policy = generate_policy(user_id, 'Allow', event['methodArn'])
-        
-        # Add user context
-        policy['context'] = {
-            'user_id': user_id,
-            'email': payload.get('email', '')
-        }
-        
-        return policy
+        payload = json.loads(_b64url_decode(payload_segment))
+    except (ValueError, AttributeError):
+        return None, 'malformed token'
     
-    except jwt.ExpiredSignatureError:
-        print("Token expired")
-        raise Exception('Unauthorized - Token expired')
+    if not isinstance(payload, dict):
+        return None, 'malformed payload'
     
-    except jwt.InvalidTokenError as e:
-        print(f"Invalid token: {str(e)}")
-        raise Exception('Unauthorized - Invalid token')
+    now = time.time()
+    exp = payload.get('exp')
+    if exp is not None:
+        if not isinstance(exp, (int, float)):
+            return None, 'exp claim must be a number'
+        if exp <= now:
+            return None, 'expired'
     
-    except Exception as e:
-        print(f"Authorization error: {str(e)}")
-        raise Exception('Unauthorized')
+    nbf = payload.get('nbf')
+    if isinstance(nbf, (int, float)) and nbf > now:
+        return None, 'token not yet valid'
+    
+    return payload, None
 
 
 def extract_token(event):
     """Extract JWT token from request"""
-    # Check Authorization header
-    headers = event.get('headers', {})
-    
-    # Handle case-insensitive headers
-    auth_header = None
-    for key, value in headers.items():
-        if key.lower() == 'authorization':
-            auth_header = value
-            break
+    # Check Authorization header - HTTP APIs lowercase header names, REST APIs
+    # keep the client's casing, so try the two common forms before a full scan
+    headers = event.get('headers') or {}
+    auth_header = headers.get('Authorization') or headers.get('authorization')
+    if auth_header is None and headers:
+        auth_header = {k.lower(): v for k, v in headers.items()}.get('authorization')
     
     if auth_header:
         # Remove 'Bearer ' prefix if present
-        if auth_header.startswith('Bearer '):
-            return auth_header[7:]
-        return auth_header
+        return auth_header.removeprefix('Bearer ')
     
     # Check query string
     query_params = event.get('queryStringParameters', {})
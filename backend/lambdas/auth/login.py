@@ -4,46 +4,85 @@ Handles user authentication and login tracking with JWT token generation
 """
 
 import json
-import boto3
+from botocore.exceptions import ClientError
 import os
+import logging
 import hashlib
-import jwt
-from datetime import datetime, timedelta
-from decimal import Decimal
+import hmac
+from datetime import datetime, timedelta, timezone
 
-# Initialize DynamoDB
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ.get('USERS_TABLE', 'immigration-users'))
+from passwords import DUMMY_SALT, SCRYPT_N, hash_password
 
-def hash_password(password):
-    """Hash password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+# Import directly - Lambda Layer adds /opt/python to path
+from aws_clients import get_table
+from validators import EMAIL_PATTERN, VISA_TYPES_BY_CODE
+
+# Lambda installs a root handler; LOG_LEVEL=DEBUG turns on verbose output
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'WARNING'))
+
+# Shared keep-alive resource from aws_clients, reused by warm invocations
+table = get_table(os.environ.get('USERS_TABLE', 'immigration-users'))
+
+def verify_password(password, user):
+    """Check password against the stored hash in constant time"""
+    stored_hash = user.get('password_hash', '')
+    salt = user.get('password_salt')
+    if salt:
+        candidate = hash_password(password, bytes.fromhex(salt), int(user.get('password_n', SCRYPT_N)))
+    else:
+        # Accounts created before the scrypt migration store an unsalted SHA-256
+        candidate = hashlib.sha256(password.encode()).hexdigest()
+    return hmac.compare_digest(candidate, stored_hash)
 
 def create_jwt_token(user_id: str, email: str) -> str:
     """Create JWT token for authenticated user"""
+    # PyJWT pulls in its crypto backends, so only load it once a token is needed
+    import jwt
+    
     jwt_secret = os.environ.get('JWT_SECRET', 'your-secret-key')
     
+    now = datetime.now(timezone.utc)
     payload = {
         'user_id': user_id,
         'email': email,
-        'iat': datetime.utcnow(),
-        'exp': datetime.utcnow() + timedelta(days=7)
+        'iat': now,
+        'exp': now + timedelta(days=7)
     }
     
     token = jwt.encode(payload, jwt_secret, algorithm='HS256')
     return token
 
+def format_created_at(value):
+    """Render created_at as ISO 8601 - signup stores epoch seconds, older rows ISO strings"""
+    if value is None or isinstance(value, str):
+        return value
+    return datetime.fromtimestamp(int(value), timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+# Same body for unknown email, bad format and wrong password so callers
+# cannot tell which accounts exist
+INVALID_CREDENTIALS_BODY = {
+    'success': False,
+    'error': {
+        'code': 'INVALID_CREDENTIALS',
+        'message': 'Invalid email or password'
+    }
+}
+
+# Shared by every response - API Gateway only reads it, so one dict is reused
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Requested-With',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+    'Access-Control-Allow-Credentials': 'false',
+    'Content-Type': 'application/json'
+}
+
 def create_response(status_code, body):
     """Create standardized API response with CORS headers"""
     return {
         'statusCode': status_code,
-        'headers': {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Requested-With',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
-            'Access-Control-Allow-Credentials': 'false',
-            'Content-Type': 'application/json'
-        },
+        'headers': CORS_HEADERS,
         'body': json.dumps(body, default=str)
     }
 
@@ -55,7 +94,7 @@ def lambda_handler(event, context):
         return create_response(200, {'message': 'OK'})
     
     try:
-        print(f"Login request received: {event.get('requestContext', {}).get('requestId', 'N/A')}")
+        logger.info("Login request received: %s", event.get('requestContext', {}).get('requestId', 'N/A'))
         
         if not event.get('body'):
             return create_response(400, {
@@ -80,7 +119,9 @@ def lambda_handler(event, context):
                 }
             })
         
-        password_hash = hash_password(password)
+        # Reject malformed emails before spending a DynamoDB round trip on them
+        if not EMAIL_PATTERN.match(email):
+            return create_response(401, INVALID_CREDENTIALS_BODY)
         
         try:
             response = table.query(
@@ -93,18 +134,15 @@ def lambda_handler(event, context):
             )
             
             if not response.get('Items'):
-                return create_response(401, {
-                    'success': False,
-                    'error': {
-                        'code': 'INVALID_CREDENTIALS',
-                        'message': 'Invalid email or password'
-                    }
-                })
+                # Pay the same scrypt cost as a wrong password so response
+                # time does not reveal which emails have accounts
+                hash_password(password, DUMMY_SALT)
+                return create_response(401, INVALID_CREDENTIALS_BODY)
             
             user = response['Items'][0]
             
         except Exception as e:
-            print(f"Error querying user: {str(e)}")
+            logger.error("Error querying user: %s", e)
             return create_response(500, {
                 'success': False,
                 'error': {
@@ -113,14 +151,8 @@ def lambda_handler(event, context):
                 }
             })
         
-        if user.get('password_hash') != password_hash:
-            return create_response(401, {
-                'success': False,
-                'error': {
-                    'code': 'INVALID_CREDENTIALS',
-                    'message': 'Invalid email or password'
-                }
-            })
+        if not verify_password(password, user):
+            return create_response(401, INVALID_CREDENTIALS_BODY)
         
         if not user.get('is_active', True):
             return create_response(403, {
@@ -131,25 +163,36 @@ def lambda_handler(event, context):
                 }
             })
         
-        current_login_count = int(user.get('login_count', 0))
-        new_login_count = current_login_count + 1
-        timestamp = datetime.utcnow().isoformat() + 'Z'
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
         
+        # Bump login tracking in one atomic write; the condition guards against
+        # the password changing or the account being disabled since the query
         try:
-            table.update_item(
+            updated = table.update_item(
                 Key={'user_id': user['user_id']},
-                UpdateExpression='SET login_count = :count, last_login = :time',
+                UpdateExpression='SET login_count = if_not_exists(login_count, :zero) + :one, last_login = :time',
+                ConditionExpression='password_hash = :hash AND (attribute_not_exists(is_active) OR is_active = :active)',
                 ExpressionAttributeValues={
-                    ':count': new_login_count,
-                    ':time': timestamp
-                }
+                    ':zero': 0,
+                    ':one': 1,
+                    ':time': timestamp,
+                    ':hash': user['password_hash'],
+                    ':active': True
+                },
+                ReturnValues='ALL_NEW'
             )
+            user = updated['Attributes']
         except Exception as e:
-            print(f"Error updating login tracking: {str(e)}")
+            if isinstance(e, ClientError) and e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return create_response(401, INVALID_CREDENTIALS_BODY)
+            logger.error("Error updating login tracking: %s", e)
+            user['login_count'] = int(user.get('login_count', 0)) + 1
+            user['last_login'] = timestamp
         
-        is_first_login = (current_login_count == 0)
+        new_login_count = int(user['login_count'])
+        is_first_login = (new_login_count == 1)
         
-        print(f"User logged in successfully: {user['user_id']} (Login #{new_login_count})")
+        logger.info("User logged in successfully: %s (Login #%d)", user['user_id'], new_login_count)
         
         jwt_token = create_jwt_token(user['user_id'], user['email'])
         
@@ -157,10 +200,10 @@ def lambda_handler(event, context):
             'user_id': user['user_id'],
             'email': user['email'],
             'full_name': user['full_name'],
-            'visa_type': user['visa_type'],
+            'visa_type': VISA_TYPES_BY_CODE.get(user['visa_type'], user['visa_type']),
             'login_count': new_login_count,
-            'last_login': timestamp,
-            'created_at': user.get('created_at'),
+            'last_login': user['last_login'],
+            'created_at': format_created_at(user.get('created_at')),
             'is_active': user.get('is_active', True)
         }
         
@@ -183,7 +226,7 @@ def lambda_handler(event, context):
             }
         })
     except Exception as e:
-        print(f"Unexpected error in login: {str(e)}")
+        logger.exception("Unexpected error in login: %s", e)
         return create_response(500, {
             'success': False,
             'error': {
@@ -0,0 +1,26 @@
+"""
+Password Hashing
+scrypt parameters and hashing shared by signup and login
+"""
+
+import hashlib
+import os
+
+# scrypt work factor - tunable per environment since Lambda CPU scales with memory.
+# Stored per user, so it can be raised later without breaking older accounts
+SCRYPT_N = int(os.environ.get('SCRYPT_N', 2 ** 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# Fixed salt for the throwaway hash login runs on unknown emails
+DUMMY_SALT = bytes(16)
+
+
+def hash_password(password, salt, n=SCRYPT_N):
+    """Hash password using scrypt with a per-user salt"""
+    # scrypt needs about 128 * r * n * p bytes; OpenSSL's default 32 MiB cap
+    # would reject any n above 2**14, so allow twice the working set
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=SCRYPT_R, p=SCRYPT_P, dklen=32,
+        maxmem=2 * 128 * SCRYPT_R * n * SCRYPT_P
+    ).hex()
@@ -4,67 +4,80 @@ Handles new user registration with validation, password hashing, and JWT token g
 """
 
 import json
-import boto3
 import os
+import logging
 import uuid
-import hashlib
-import jwt
-import re
-from datetime import datetime, timedelta
-from decimal import Decimal
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
-# Initialize DynamoDB
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ.get('USERS_TABLE', 'immigration-users'))
+from passwords import SCRYPT_N, hash_password
+
+# Import directly - Lambda Layer adds /opt/python to path
+from aws_clients import get_table
+from validators import EMAIL_PATTERN, VISA_TYPE_CODES
+
+# Lambda installs a root handler; LOG_LEVEL=DEBUG turns on verbose output
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'WARNING'))
+
+# Shared keep-alive resource from aws_clients, reused by warm invocations
+table = get_table(os.environ.get('USERS_TABLE', 'immigration-users'))
 
 ALLOWED_VISA_TYPES = ['F-1', 'OPT', 'H-1B', 'L-1', 'O-1']
 
+# scrypt releases the GIL, so hashing on a worker overlaps the email lookup
+_hash_executor = ThreadPoolExecutor(max_workers=1)
+
 def validate_email(email):
     """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return EMAIL_PATTERN.match(email) is not None
 
 def validate_password(password):
     """Validate password strength"""
     if len(password) < 8:
         return False, "Password must be at least 8 characters long"
-    if not re.search(r'[A-Z]', password):
+    if not any(ch.isupper() for ch in password):
         return False, "Password must contain at least one uppercase letter"
-    if not re.search(r'[a-z]', password):
+    if not any(ch.islower() for ch in password):
         return False, "Password must contain at least one lowercase letter"
-    if not re.search(r'\d', password):
+    if not any(ch.isdigit() for ch in password):
         return False, "Password must contain at least one number"
     return True, "Valid"
 
-def hash_password(password):
-    """Hash password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
-
 def create_jwt_token(user_id: str, email: str) -> str:
     """Create JWT token for new user"""
+    # PyJWT pulls in its crypto backends, so only load it once a token is needed
+    import jwt
+    
     jwt_secret = os.environ.get('JWT_SECRET', 'your-secret-key')
     
+    now = datetime.now(timezone.utc)
     payload = {
         'user_id': user_id,
         'email': email,
-        'iat': datetime.utcnow(),
-        'exp': datetime.utcnow() + timedelta(days=7)
+        'iat': now,
+        'exp': now + timedelta(days=7)
     }
     
     token = jwt.encode(payload, jwt_secret, algorithm='HS256')
     return token
 
+# Shared by every response - API Gateway only reads it, so one dict is reused
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Requested-With',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+    'Access-Control-Allow-Credentials': 'false',
+    'Content-Type': 'application/json'
+}
+
 def create_response(status_code, body):
     """Create standardized API response with CORS headers"""
     return {
         'statusCode': status_code,
-        'headers': {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Requested-With',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
-            'Access-Control-Allow-Credentials': 'false',
-            'Content-Type': 'application/json'
-        },
+        'headers': CORS_HEADERS,
         'body': json.dumps(body, default=str)
     }
 
@@ -76,7 +89,7 @@ def lambda_handler(event, context):
         return create_response(200, {'message': 'OK'})
     
     try:
-        print(f"Signup request received: {event.get('requestContext', {}).get('requestId', 'N/A')}")
+        logger.info("Signup request received: %s", event.get('requestContext', {}).get('requestId', 'N/A'))
         
         if not event.get('body'):
             return create_response(400, {
@@ -131,6 +144,10 @@ def lambda_handler(event, context):
                 }
             })
         
+        # Start hashing now; it runs while the existing-user query is in flight
+        password_salt = secrets.token_bytes(16)
+        hash_future = _hash_executor.submit(hash_password, password, password_salt)
+        
         try:
             response = table.query(
                 IndexName='email-index',
@@ -150,27 +167,30 @@ def lambda_handler(event, context):
                     }
                 })
         except Exception as e:
-            print(f"Error checking existing user: {str(e)}")
+            logger.error("Error checking existing user: %s", e)
         
         user_id = str(uuid.uuid4())
-        timestamp = datetime.utcnow().isoformat() + 'Z'
-        password_hash = hash_password(password)
+        created_at = int(time.time())
+        password_hash = hash_future.result()
         
+        # Kept compact to save write capacity: visa type as its short code,
+        # created_at as epoch seconds, and no last_login until the first login
         user_data = {
             'user_id': user_id,
             'email': email,
             'password_hash': password_hash,
+            'password_salt': password_salt.hex(),
+            'password_n': SCRYPT_N,
             'full_name': full_name,
-            'visa_type': visa_type,
+            'visa_type': VISA_TYPE_CODES[visa_type],
             'login_count': 0,
-            'created_at': timestamp,
-            'last_login': timestamp,
+            'created_at': created_at,
             'is_active': True
         }
         
         table.put_item(Item=user_data)
         
-        print(f"User created successfully: {user_id}")
+        logger.info("User created successfully: %s", user_id)
         
         jwt_token = create_jwt_token(user_id, email)
         
@@ -180,7 +200,7 @@ def lambda_handler(event, context):
             'full_name': full_name,
             'visa_type': visa_type,
             'login_count': 0,
-            'created_at': timestamp,
+            'created_at': datetime.fromtimestamp(created_at, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
             'is_active': True
         }
         
@@ -202,7 +222,7 @@ def lambda_handler(event, context):
             }
         })
     except Exception as e:
-        print(f"Unexpected error in signup: {str(e)}")
+        logger.exception("Unexpected error in signup: %s", e)
         return create_response(500, {
             'success': False,
             'error': {
@@ -3,46 +3,49 @@ Get Documents Lambda
 Returns list of all documents for a user
 """
 
-import json
-import boto3
+import orjson
 import os
-from decimal import Decimal
-from boto3.dynamodb.conditions import Key
+import logging
 
-# AWS clients
-dynamodb = boto3.resource('dynamodb')
+# Import directly - Lambda Layer adds /opt/python to path
+from aws_clients import get_table
+from serialization import json_default
+
+# Lambda installs a root handler; LOG_LEVEL=DEBUG turns on verbose output
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'WARNING'))
 
 # Environment variables
 DOCUMENTS_TABLE = os.environ.get('DOCUMENTS_TABLE', 'immigration-documents')
 
-# DynamoDB table
-documents_table = dynamodb.Table(DOCUMENTS_TABLE)
+# Shared keep-alive resource from aws_clients, reused by warm invocations
+documents_table = get_table(DOCUMENTS_TABLE)
+
+# Only the attributes the document summary needs - skips raw_text and
+# the rest of extracted_data on the wire
+SUMMARY_PROJECTION = (
+    'document_id, document_type, file_name, #s, created_at, updated_at, '
+    'extracted_data.full_name, extracted_data.sevis_id, '
+    'extracted_data.program_end_date, error_message'
+)
 
 
-def decimal_to_native(obj):
-    """Convert DynamoDB Decimal types to native Python types."""
-    if isinstance(obj, list):
-        return [decimal_to_native(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: decimal_to_native(value) for key, value in obj.items()}
-    elif isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    else:
-        return obj
+# Shared by every response - API Gateway only reads it, so one dict is reused
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Requested-With',
+    'Access-Control-Allow-Methods': 'GET,OPTIONS',
+    'Access-Control-Allow-Credentials': 'false',
+    'Content-Type': 'application/json'
+}
 
 
 def create_response(status_code: int, body: dict) -> dict:
     """Create standardized API response with CORS headers."""
     return {
         'statusCode': status_code,
-        'headers': {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Requested-With',
-            'Access-Control-Allow-Methods': 'GET,OPTIONS',
-            'Access-Control-Allow-Credentials': 'false',
-            'Content-Type': 'application/json'
-        },
-        'body': json.dumps(decimal_to_native(body), default=str)
+        'headers': CORS_HEADERS,
+        'body': orjson.dumps(body, default=json_default).decode()
     }
 
 
@@ -64,8 +67,7 @@ def lambda_handler(event, context):
     }
     """
     
-    print("=== Get Documents Lambda Started ===")
-    print(f"Request ID: {event.get('requestContext', {}).get('requestId', 'N/A')}")
+    logger.info("Get Documents request: %s", event.get('requestContext', {}).get('requestId', 'N/A'))
     
     # Handle OPTIONS preflight
     if event.get('httpMethod') == 'OPTIONS':
@@ -91,21 +93,32 @@ def lambda_handler(event, context):
         # For now, use test user
         user_id = 'test-user-123'
         
-        print(f"Fetching documents for user: {user_id}")
+        logger.info("Fetching documents for user: %s", user_id)
         
         # Query DynamoDB for all user's documents
+        query_kwargs = {
+            'IndexName': 'user-created-index',
+            'KeyConditionExpression': 'user_id = :uid',
+            'ProjectionExpression': SUMMARY_PROJECTION,
+            'ExpressionAttributeNames': {'#s': 'status'},
+            'ExpressionAttributeValues': {':uid': user_id},
+            'ScanIndexForward': False,  # Sort by created_at descending (newest first)
+            'Limit': limit
+        }
+        
+        # Filter by status server-side so non-matching items never leave DynamoDB
+        if status_filter:
+            query_kwargs['FilterExpression'] = '#s = :status'
+            query_kwargs['ExpressionAttributeValues'][':status'] = status_filter.lower()
+        
         try:
-            response = documents_table.query(
-                KeyConditionExpression=Key('user_id').eq(user_id),
-                ScanIndexForward=False,  # Sort by document_id descending (newest first)
-                Limit=limit
-            )
+            response = documents_table.query(**query_kwargs)
             
             documents = response.get('Items', [])
-            print(f"Found {len(documents)} documents")
+            logger.info("Found %d documents", len(documents))
             
         except Exception as e:
-            print(f"DynamoDB query error: {str(e)}")
+            logger.error("DynamoDB query error: %s", e)
             return create_response(500, {
                 'success': False,
                 'error': {
@@ -114,21 +127,6 @@ def lambda_handler(event, context):
                 }
             })
         
-        # Filter by status if specified
-        if status_filter:
-            documents = [
-                doc for doc in documents 
-                if doc.get('status', '').lower() == status_filter.lower()
-            ]
-            print(f"Filtered to {len(documents)} documents with status: {status_filter}")
-        
-        # Sort by created_at (newest first)
-        try:
-            documents.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        except Exception as e:
-            print(f"Sorting error: {str(e)}")
-            # Continue without sorting
-        
         # Build response with document summaries
         document_summaries = []
         for doc in documents:
@@ -156,7 +154,7 @@ def lambda_handler(event, context):
             
             document_summaries.append(summary)
         
-        print(f"Returning {len(document_summaries)} documents")
+        logger.info("Returning %d documents", len(document_summaries))
         
         return create_response(200, {
             'success': True,
@@ -176,9 +174,7 @@ def lambda_handler(event, context):
         })
     
     except Exception as e:
-        print(f"Unexpected error in get_documents Lambda: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Unexpected error in get_documents Lambda: %s", e)
         
         return create_response(500, {
             'success': False,
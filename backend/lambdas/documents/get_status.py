@@ -9,39 +9,55 @@ This Lambda:
 4. Provides real-time status updates for frontend polling
 """
 
-import json
-import boto3
+import orjson
+from boto3.dynamodb.types import TypeDeserializer
 import os
-from decimal import Decimal
+import logging
 
-# AWS clients
-dynamodb = boto3.resource('dynamodb')
+# Import directly - Lambda Layer adds /opt/python to path
+from aws_clients import get_dynamodb_client
+from serialization import json_default
+
+# Lambda installs a root handler; LOG_LEVEL=DEBUG turns on verbose output
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'WARNING'))
 
 # Environment variables
 DOCUMENTS_TABLE = os.environ.get('DOCUMENTS_TABLE', 'immigration-documents')
+DAX_ENDPOINT = os.environ.get('DAX_ENDPOINT')
 
-# DynamoDB table
-documents_table = dynamodb.Table(DOCUMENTS_TABLE)
+# Status polling is a hot key/value read, so route it through DAX when a
+# cluster is configured (keep its item TTL short, ~2-5s, so polls stay fresh).
+# The low-level client skips the resource layer's request serialization; only
+# the returned item is unmarshalled.
+if DAX_ENDPOINT:
+    from amazondax import AmazonDaxClient
+    dynamodb_client = AmazonDaxClient(endpoint_url=DAX_ENDPOINT)
+else:
+    dynamodb_client = get_dynamodb_client()
 
+_deserializer = TypeDeserializer()
 
-def decimal_to_native(obj):
-    """
-    Convert DynamoDB Decimal types to native Python types.
-    
-    Args:
-        obj: Object that may contain Decimal types
-    
-    Returns:
-        Object with Decimals converted to int/float
-    """
-    if isinstance(obj, list):
-        return [decimal_to_native(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: decimal_to_native(value) for key, value in obj.items()}
-    elif isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    else:
-        return obj
+# Attributes the status response can include
+STATUS_PROJECTION = (
+    'document_type, file_name, #s, processing_stage, created_at, updated_at, '
+    'extracted_data, validation_errors, error_message'
+)
+
+
+def _unmarshal(item: dict) -> dict:
+    """Convert a low-level DynamoDB item into native Python values."""
+    return {key: _deserializer.deserialize(value) for key, value in item.items()}
+
+
+# Shared by every response - API Gateway only reads it, so one dict is reused
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Requested-With',
+    'Access-Control-Allow-Methods': 'GET,OPTIONS',
+    'Access-Control-Allow-Credentials': 'false',
+    'Content-Type': 'application/json'
+}
 
 
 def create_response(status_code: int, body: dict) -> dict:
@@ -57,14 +73,8 @@ def create_response(status_code: int, body: dict) -> dict:
     """
     return {
         'statusCode': status_code,
-        'headers': {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Requested-With',
-            'Access-Control-Allow-Methods': 'GET,OPTIONS',
-            'Access-Control-Allow-Credentials': 'false',
-            'Content-Type': 'application/json'
-        },
-        'body': json.dumps(decimal_to_native(body), default=str)
+        'headers': CORS_HEADERS,
+        'body': orjson.dumps(body, default=json_default).decode()
     }
 
 
@@ -91,8 +101,7 @@ def lambda_handler(event, context):
     }
     """
     
-    print("=== Get Status Lambda Started ===")
-    print(f"Request ID: {event.get('requestContext', {}).get('requestId', 'N/A')}")
+    logger.info("Get Status request: %s", event.get('requestContext', {}).get('requestId', 'N/A'))
     
     # Handle OPTIONS preflight
     if event.get('httpMethod') == 'OPTIONS':
@@ -112,7 +121,7 @@ def lambda_handler(event, context):
                 }
             })
         
-        print(f"Checking status for document: {document_id}")
+        logger.info("Checking status for document: %s", document_id)
         
         # TODO: Extract user_id from JWT token
         # For now, use test user
@@ -120,14 +129,17 @@ def lambda_handler(event, context):
         
         # Query DynamoDB
         try:
-            response = documents_table.get_item(
+            response = dynamodb_client.get_item(
+                TableName=DOCUMENTS_TABLE,
                 Key={
-                    'user_id': user_id,
-                    'document_id': document_id
-                }
+                    'user_id': {'S': user_id},
+                    'document_id': {'S': document_id}
+                },
+                ProjectionExpression=STATUS_PROJECTION,
+                ExpressionAttributeNames={'#s': 'status'}
             )
         except Exception as e:
-            print(f"DynamoDB query error: {str(e)}")
+            logger.error("DynamoDB query error: %s", e)
             return create_response(500, {
                 'success': False,
                 'error': {
@@ -138,7 +150,7 @@ def lambda_handler(event, context):
         
         # Check if document exists
         if 'Item' not in response:
-            print(f"Document not found: {document_id}")
+            logger.info("Document not found: %s", document_id)
             return create_response(404, {
                 'success': False,
                 'error': {
@@ -147,8 +159,8 @@ def lambda_handler(event, context):
                 }
             })
         
-        document = response['Item']
-        print(f"Document status: {document.get('status')}")
+        document = _unmarshal(response['Item'])
+        logger.info("Document status: %s", document.get('status'))
         
         # Build response based on status
         status = document.get('status', 'unknown')
@@ -187,7 +199,7 @@ def lambda_handler(event, context):
         else:
             response_data['message'] = f'Document status: {status}'
         
-        print(f"Returning status for {document_id}: {status}")
+        logger.info("Returning status for %s: %s", document_id, status)
         
         return create_response(200, {
             'success': True,
@@ -195,9 +207,7 @@ def lambda_handler(event, context):
         })
     
     except Exception as e:
-        print(f"Unexpected error in get_status Lambda: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Unexpected error in get_status Lambda: %s", e)
         
         return create_response(500, {
             'success': False,
@@ -1,90 +1,237 @@
 import json
+import orjson
 import os
-import boto3
-from datetime import datetime
-from decimal import Decimal
-import traceback
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Context
+import logging
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
 
-s3_client = boto3.client('s3')
-textract_client = boto3.client('textract')
-dynamodb = boto3.resource('dynamodb')
+# Lambda installs a root handler; LOG_LEVEL=DEBUG turns on verbose output
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'WARNING'))
+
+# Import directly - Lambda Layer adds /opt/python to path
+from aws_clients import get_s3, get_textract, get_table
+from errors import AIRateLimitError
 
 DOCUMENTS_TABLE = os.environ.get('DOCUMENTS_TABLE', 'immigration-documents')
+
+# Resolved once per container and reused by every invocation
+s3_client = get_s3()
+textract_client = get_textract()
+documents_table = get_table(DOCUMENTS_TABLE)
+# The 'processing' marker is throwaway, so its write is not retried
+progress_table = get_table(DOCUMENTS_TABLE, best_effort=True)
+
+# Runs the 'processing' status write while Textract is in flight, and the
+# records of an SQS batch concurrently (batches hold up to 25 messages)
+_executor = ThreadPoolExecutor(max_workers=25)
+
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
 
-try:
+# Gemini calls in flight per container, however many records a batch holds.
+# Same cap as the policy scraper's, which sits below the Gemini rate limit
+GEMINI_MAX_CONCURRENCY = 8
+_gemini_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+# Rate-limited calls back off and retry before the document is given up on
+GEMINI_RATE_LIMIT_RETRIES = 3
+GEMINI_RETRY_DELAY = 2.0
+# Matches the queue's maxReceiveCount; a message still rate limited on its
+# last delivery fails its document instead of going to the dead-letter queue
+COMPLETE_MAX_RECEIVES = 5
+
+# Truncation limits for what is sent to Gemini and stored on the document
+AI_TEXT_MAX_LENGTH = 2000
+RAW_TEXT_MAX_LENGTH = 5000
+ERROR_MESSAGE_MAX_LENGTH = 500
+
+# Confidence scores only need a few significant digits; converting the float
+# directly through a context skips the str() round trip
+_SCORE_CONTEXT = Context(prec=6)
+
+# When set, OCR runs as an async Textract job that reports back through
+# SNS -> SQS -> complete_handler instead of blocking this invocation
+TEXTRACT_SNS_TOPIC_ARN = os.environ.get('TEXTRACT_SNS_TOPIC_ARN')
+TEXTRACT_ROLE_ARN = os.environ.get('TEXTRACT_ROLE_ARN')
+
+@lru_cache(maxsize=1)
+def _lazy_gemini():
+    """Import and configure Gemini on first use, returning a shared model"""
     import google.generativeai as genai
     if GEMINI_API_KEY:
         genai.configure(api_key=GEMINI_API_KEY)
-except Exception as e:
-    print(f"Gemini error: {e}")
+    # JSON mode - the reply is bare JSON with no markdown fences to strip
+    return genai.GenerativeModel(
+        'gemini-1.5-flash',
+        generation_config={'response_mime_type': 'application/json'}
+    )
+
+def ids_from_key(key):
+    # upload.py writes objects as user_id/document_id/file_name
+    user_id, _, rest = key.partition('/')
+    doc_id, _, _ = rest.partition('/')
+    return user_id, doc_id
 
 def lambda_handler(event, context):
-    print(f"Event: {json.dumps(event)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Event: %s", json.dumps(event))
+    # S3 can deliver several objects in one event; each is its own document
+    codes = list(_executor.map(process_record, event['Records']))
+    return {'statusCode': max(codes)}
+
+def process_record(record):
+    key = record['s3']['object']['key']
+    user_id, doc_id = ids_from_key(key)
     try:
-        record = event['Records'][0]
         bucket = record['s3']['bucket']['name']
-        key = record['s3']['object']['key']
-        
-        parts = key.split('/')
-        user_id = parts[1]
-        doc_id = parts[2].split('_')[0]
         
-        update_status(user_id, doc_id, 'processing')
-        text = extract_text(bucket, key)
+        # Nested on the same pool - an S3 event carries at most 10 records,
+        # so outer and inner tasks together stay under the worker cap
+        status_future = _executor.submit(update_status, user_id, doc_id, 'processing', table=progress_table)
+        try:
+            if TEXTRACT_SNS_TOPIC_ARN:
+                start_text_detection(bucket, key)
+                return 202
+            text = extract_text(bucket, key)
+        finally:
+            # The progress marker must land before any later status write
+            status_future.result()
         data = analyze_ai(text)
-        save_data(user_id, doc_id, data, text)
-        update_status(user_id, doc_id, 'success')
+        save_and_complete(user_id, doc_id, data, text)
         
-        return {'statusCode': 200}
+        return 200
     except Exception as e:
-        print(f"ERROR: {e}\n{traceback.format_exc()}")
-        try:
-            parts = event['Records'][0]['s3']['object']['key'].split('/')
-            update_status(parts[1], parts[2].split('_')[0], 'failed', str(e))
-        except: pass
-        return {'statusCode': 500}
+        logger.exception("Document processing failed for %s: %s", doc_id, e)
+        update_status(user_id, doc_id, 'failed', str(e))
+        return 500
+
+def complete_handler(event, context):
+    """Finish documents whose async Textract job has published its result"""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Event: %s", json.dumps(event))
+    # Records in a batch are independent documents, so they finish side by side.
+    # Rate-limited ones are handed back to SQS to retry on a later delivery
+    retry_ids = [i for i in _executor.map(complete_record, event['Records']) if i]
+    return {'batchItemFailures': [{'itemIdentifier': i} for i in retry_ids]}
+
+def complete_record(record):
+    try:
+        message = json.loads(record['body'])
+        user_id, doc_id = ids_from_key(message['DocumentLocation']['S3ObjectName'])
+    except (ValueError, TypeError, KeyError) as e:
+        # Not a Textract completion - no document to fail, and redelivery
+        # cannot fix it, so drop it instead of failing the whole batch
+        logger.error("Dropping malformed Textract message %s: %s", record.get('messageId'), e)
+        return
+    try:
+        if message['Status'] != 'SUCCEEDED':
+            raise RuntimeError(f"Textract job {message['JobId']} ended with {message['Status']}")
+        text = fetch_detected_text(message['JobId'])
+        data = analyze_ai(text)
+        save_and_complete(user_id, doc_id, data, text)
+    except AIRateLimitError as e:
+        if int(record.get('attributes', {}).get('ApproximateReceiveCount', 1)) < COMPLETE_MAX_RECEIVES:
+            logger.warning("Gemini rate limited for %s; returning it to the queue", doc_id)
+            return record['messageId']
+        logger.error("Document completion failed for %s: %s", doc_id, e)
+        update_status(user_id, doc_id, 'failed', str(e))
+    except Exception as e:
+        logger.exception("Document completion failed for %s: %s", doc_id, e)
+        update_status(user_id, doc_id, 'failed', str(e))
+
+def start_text_detection(bucket, key):
+    # Multi-page PDFs are OCR'd by Textract in parallel on its side
+    textract_client.start_document_text_detection(
+        DocumentLocation={'S3Object': {'Bucket': bucket, 'Name': key}},
+        NotificationChannel={'SNSTopicArn': TEXTRACT_SNS_TOPIC_ARN, 'RoleArn': TEXTRACT_ROLE_ARN}
+    )
+
+def fetch_detected_text(job_id):
+    lines = []
+    kwargs = {'JobId': job_id}
+    while True:
+        resp = textract_client.get_document_text_detection(**kwargs)
+        lines.extend(b['Text'] for b in resp.get('Blocks', []) if b['BlockType'] == 'LINE')
+        if 'NextToken' not in resp:
+            return '\n'.join(lines)
+        kwargs['NextToken'] = resp['NextToken']
 
 def extract_text(bucket, key):
     resp = textract_client.detect_document_text(
         Document={'S3Object': {'Bucket': bucket, 'Name': key}}
     )
-    return '\n'.join([b['Text'] for b in resp.get('Blocks', []) if b['BlockType'] == 'LINE'])
+    return '\n'.join(b['Text'] for b in resp.get('Blocks', []) if b['BlockType'] == 'LINE')
 
 def analyze_ai(text):
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        prompt = f"""Extract I-20 data as JSON only:
+    prompt = f"""Extract I-20 data as JSON only:
 {{"full_name":"","sevis_id":"","date_of_birth":"","school_name":"","program_end_date":"","confidence_scores":{{}}}}
-Text: {text[:2000]}"""
-        result = model.generate_content(prompt).text.strip()
-        if '```' in result:
-            result = result.split('```')[1].replace('json','').strip()
-        return json.loads(result)
-    except Exception as e:
-        return {"error": str(e)}
+Text: {text[:AI_TEXT_MAX_LENGTH]}"""
+    for attempt in range(GEMINI_RATE_LIMIT_RETRIES + 1):
+        try:
+            with _gemini_slots:
+                reply = _lazy_gemini().generate_content(prompt).text
+            return orjson.loads(reply)
+        except Exception as e:
+            if not _is_rate_limited(e):
+                return {"error": str(e)}
+            if attempt == GEMINI_RATE_LIMIT_RETRIES:
+                raise AIRateLimitError(f"Gemini rate limited after {attempt + 1} attempts")
+            # Full-jitter backoff, slept outside the slot so others can call
+            time.sleep(random.uniform(0, GEMINI_RETRY_DELAY * (2 ** attempt)))
 
-def save_data(uid, did, data, text):
+def _is_rate_limited(error):
+    # google.api_core's ResourceExhausted carries the HTTP status as .code
+    return getattr(error, 'code', None) == 429
+
+def utc_timestamp():
+    # Timezone-aware; same format upload.py writes for created_at
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+def save_and_complete(uid, did, data, text, status='success'):
+    # Extracted data and the final status share one write to the same row
     if 'confidence_scores' in data:
-        data['confidence_scores'] = {k: Decimal(str(v)) for k, v in data['confidence_scores'].items() if isinstance(v, (int, float))}
-    dynamodb.Table(DOCUMENTS_TABLE).update_item(
+        data['confidence_scores'] = {k: _SCORE_CONTEXT.create_decimal_from_float(v) for k, v in data['confidence_scores'].items() if isinstance(v, (int, float))}
+    now = utc_timestamp()
+    raw_text = text[:RAW_TEXT_MAX_LENGTH]
+    documents_table.update_item(
         Key={'user_id': uid, 'document_id': did},
-        UpdateExpression='SET extracted_data=:d, raw_text=:t, processed_at=:time',
-        ExpressionAttributeValues={':d': data, ':t': text[:5000], ':time': datetime.utcnow().isoformat()}
+        UpdateExpression='SET extracted_data=:d, raw_text=:t, processed_at=:p, #s=:st, updated_at=:u',
+        ExpressionAttributeNames={'#s': 'status'},
+        ExpressionAttributeValues={':d': data, ':t': raw_text, ':p': now, ':st': status, ':u': now},
+        ReturnValues='NONE',
+        ReturnConsumedCapacity='NONE'
     )
 
-def update_status(uid, did, status, error=None):
+# update_status only ever needs one of these two expressions
+_STATUS_EXPR = 'SET #s=:st, updated_at=:t'
+_STATUS_ERROR_EXPR = 'SET #s=:st, updated_at=:t, error_message=:e'
+# Only move documents that are still in flight, so a redelivered
+# S3 event cannot knock a finished document back to 'processing'
+_IN_FLIGHT_CONDITION = 'attribute_not_exists(#s) OR #s IN (:uploading, :processing)'
+
+def update_status(uid, did, status, error=None, table=documents_table):
     try:
-        expr = 'SET #s=:st, updated_at=:t'
-        vals = {':st': status, ':t': datetime.utcnow().isoformat()}
+        vals = {':st': status, ':t': utc_timestamp(), ':uploading': 'uploading', ':processing': 'processing'}
         if error:
-            expr += ', error_message=:e'
-            vals[':e'] = error[:500]
-        dynamodb.Table(DOCUMENTS_TABLE).update_item(
+            vals[':e'] = error[:ERROR_MESSAGE_MAX_LENGTH]
+        table.update_item(
             Key={'user_id': uid, 'document_id': did},
-            UpdateExpression=expr,
+            UpdateExpression=_STATUS_ERROR_EXPR if error else _STATUS_EXPR,
+            ConditionExpression=_IN_FLIGHT_CONDITION,
             ExpressionAttributeNames={'#s': 'status'},
-            ExpressionAttributeValues=vals
+            ExpressionAttributeValues=vals,
+            ReturnValues='NONE',
+            ReturnConsumedCapacity='NONE'
         )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            logger.info("Document %s already finished; skipping %s", did, status)
+        else:
+            logger.error("Status update to %s failed for %s: %s", status, did, e)
     except Exception as e:
-        print(f"Status error: {e}")
\ No newline at end of file
+        logger.error("Status update to %s failed for %s: %s", status, did, e)
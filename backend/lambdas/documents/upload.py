@@ -10,28 +10,43 @@ This Lambda:
 """
 
 import json
-import boto3
 import os
+import logging
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
-# AWS clients
-s3_client = boto3.client('s3')
-dynamodb = boto3.resource('dynamodb')
+# Lambda installs a root handler; LOG_LEVEL=DEBUG turns on verbose output
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'WARNING'))
+
+# Import directly - Lambda Layer adds /opt/python to path
+from aws_clients import get_s3, get_table
 
 # Environment variables
 BUCKET_NAME = os.environ.get('DOCUMENTS_BUCKET', 'immigration-ai-documents-dev')
 DOCUMENTS_TABLE = os.environ.get('DOCUMENTS_TABLE', 'immigration-documents')
 
-# DynamoDB table
-documents_table = dynamodb.Table(DOCUMENTS_TABLE)
+# AWS clients, cached per container by the shared layer
+s3_client = get_s3()
+documents_table = get_table(DOCUMENTS_TABLE)
 
 # Constants
-ALLOWED_DOCUMENT_TYPES = ['i20', 'ead', 'passport', 'i765', 'i983']
+ALLOWED_DOCUMENT_TYPES = frozenset(['i20', 'ead', 'passport', 'i765', 'i983'])
+DOCUMENT_TYPES_MESSAGE = 'document_type must be one of: i20, ead, passport, i765, i983'
 MAX_FILE_SIZE = 10485760  # 10MB in bytes
 PRESIGNED_URL_EXPIRY = 300  # 5 minutes
 
 
+# Shared by every response - API Gateway only reads it, so one dict is reused
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Requested-With',
+    'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
+    'Access-Control-Allow-Credentials': 'false',
+    'Content-Type': 'application/json'
+}
+
+
 def create_response(status_code: int, body: dict) -> dict:
     """
     Create standardized API response with CORS headers.
@@ -45,17 +60,31 @@ def create_response(status_code: int, body: dict) -> dict:
     """
     return {
         'statusCode': status_code,
-        'headers': {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Requested-With',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
-            'Access-Control-Allow-Credentials': 'false',
-            'Content-Type': 'application/json'
-        },
+        'headers': CORS_HEADERS,
         'body': json.dumps(body, default=str)
     }
 
 
+# Responses whose bodies never change are serialized once per container
+_OPTIONS_RESPONSE = create_response(200, {'message': 'OK'})
+_ERROR_TEMPLATES = {
+    'MISSING_BODY': create_response(400, {
+        'success': False,
+        'error': {
+            'code': 'MISSING_BODY',
+            'message': 'Request body is required'
+        }
+    }),
+    'INVALID_JSON': create_response(400, {
+        'success': False,
+        'error': {
+            'code': 'INVALID_JSON',
+            'message': 'Invalid JSON in request body'
+        }
+    })
+}
+
+
 def validate_request(body: dict) -> tuple:
     """
     Validate request parameters.
@@ -73,7 +102,7 @@ def validate_request(body: dict) -> tuple:
         return False, 'document_type is required'
     
     if document_type not in ALLOWED_DOCUMENT_TYPES:
-        return False, f'document_type must be one of: {", ".join(ALLOWED_DOCUMENT_TYPES)}'
+        return False, DOCUMENT_TYPES_MESSAGE
     
     # Check file_name
     file_name = body.get('file_name', '')
@@ -81,7 +110,7 @@ def validate_request(body: dict) -> tuple:
         return False, 'file_name is required'
     
     # Validate file extension
-    if not file_name.lower().endswith('.pdf'):
+    if file_name[-4:].lower() != '.pdf':
         return False, 'Only PDF files are supported'
     
     return True, None
@@ -108,35 +137,21 @@ def lambda_handler(event, context):
     }
     """
     
-    request_id = event.get('requestContext', {}).get('requestId', 'N/A')
-    print(f"=== Upload Lambda Started ===")
-    print(f"Request ID: {request_id}")
+    logger.info("Upload request: %s", event.get('requestContext', {}).get('requestId', 'N/A'))
     
     # Handle OPTIONS preflight
     if event.get('httpMethod') == 'OPTIONS':
-        return create_response(200, {'message': 'OK'})
+        return _OPTIONS_RESPONSE
     
     try:
         # Parse request body
         if not event.get('body'):
-            return create_response(400, {
-                'success': False,
-                'error': {
-                    'code': 'MISSING_BODY',
-                    'message': 'Request body is required'
-                }
-            })
+            return _ERROR_TEMPLATES['MISSING_BODY']
         
         try:
             body = json.loads(event['body'])
         except json.JSONDecodeError:
-            return create_response(400, {
-                'success': False,
-                'error': {
-                    'code': 'INVALID_JSON',
-                    'message': 'Invalid JSON in request body'
-                }
-            })
+            return _ERROR_TEMPLATES['INVALID_JSON']
         
         # Validate request
         is_valid, error_message = validate_request(body)
@@ -156,12 +171,12 @@ def lambda_handler(event, context):
         # For now, use test user
         user_id = 'test-user-123'
         
-        # Generate unique document ID
-        document_id = str(uuid.uuid4())
-        timestamp = datetime.utcnow().isoformat() + 'Z'
+        # Generate unique document ID - bare hex skips the dashed formatting
+        document_id = uuid.uuid4().hex
+        # One timestamp shared by created_at, updated_at and the upload stage
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
         
-        print(f"Generating upload URL for document: {document_id}")
-        print(f"Document type: {document_type}, File: {file_name}")
+        logger.info("Generating upload URL for document %s (%s, %s)", document_id, document_type, file_name)
         
         # S3 key format: user_id/document_id/filename
         s3_key = f'{user_id}/{document_id}/{file_name}'
@@ -181,7 +196,7 @@ def lambda_handler(event, context):
                 ExpiresIn=PRESIGNED_URL_EXPIRY
             )
         except Exception as e:
-            print(f"Error generating presigned URL: {str(e)}")
+            logger.error("Error generating presigned URL: %s", e)
             return create_response(500, {
                 'success': False,
                 'error': {
@@ -210,10 +225,10 @@ def lambda_handler(event, context):
         }
         
         try:
-            documents_table.put_item(Item=document_record)
-            print(f"Document record created in DynamoDB: {document_id}")
+            documents_table.put_item(Item=document_record, ReturnValues='NONE', ReturnConsumedCapacity='NONE')
+            logger.info("Document record created in DynamoDB: %s", document_id)
         except Exception as e:
-            print(f"Error creating DynamoDB record: {str(e)}")
+            logger.error("Error creating DynamoDB record: %s", e)
             return create_response(500, {
                 'success': False,
                 'error': {
@@ -223,7 +238,7 @@ def lambda_handler(event, context):
             })
         
         # Return success response
-        print(f"Upload URL generated successfully for {document_id}")
+        logger.info("Upload URL generated successfully for %s", document_id)
         
         return create_response(200, {
             'success': True,
@@ -237,9 +252,7 @@ def lambda_handler(event, context):
         })
     
     except Exception as e:
-        print(f"Unexpected error in upload Lambda: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Unexpected error in upload Lambda: %s", e)
         
         return create_response(500, {
             'success': False,
@@ -3,14 +3,104 @@ Google Gemini AI Client for Policy Analysis
 FREE tier - no credit card needed!
 """
 
-import google.generativeai as genai
+import hashlib
 import os
-import json
+import orjson
+import threading
 import time
+from collections import OrderedDict
+from functools import lru_cache
 from errors import AITimeoutError, AIInvalidResponseError
 from logger import get_logger
 from validators import Validators
 
+# Use Gemini 2.5 Flash - latest free model
+MODEL_NAME = 'models/gemini-2.5-flash'
+
+# USCIS republishes near-identical announcements, and a repeated prompt
+# gets the same analysis, so it is served from memory instead of Gemini.
+# Keyed by a digest of the prompt; values are the validated analysis JSON
+ANALYSIS_CACHE_MAX_SIZE = 256
+_ANALYSIS_CACHE = OrderedDict()
+_ANALYSIS_CACHE_LOCK = threading.Lock()
+
+# Static parts of the analysis prompt, built once per container
+_PROMPT_PREFIX = """Analyze this immigration policy announcement and provide structured analysis.
+
+POLICY TITLE:
+"""
+
+_PROMPT_SUFFIX = """
+
+Provide your analysis in this EXACT JSON format:
+{
+  "affected_visas": ["F-1", "OPT", "H-1B"],
+  "impact_level": "High",
+  "summary": "A 2-3 sentence plain English explanation",
+  "action_items": ["Specific action 1", "Specific action 2"]
+}
+
+RULES:
+1. affected_visas: List visa types affected. Options: F-1, OPT, H-1B, L-1, O-1. Use empty array if none.
+2. impact_level: Must be exactly one of: Critical, High, Medium, Low
+   - Critical: Immediate action required, deadline-sensitive
+   - High: Significant changes affecting many people
+   - Medium: Moderate changes
+   - Low: Minor updates
+3. summary: Write for non-experts. Explain practical implications in 2-3 sentences.
+4. action_items: List 2-5 specific actionable steps. Use empty array if none needed.
+
+Return ONLY the JSON object, nothing else."""
+
+# Structured output for analyze_policy - Gemini returns exactly this shape
+POLICY_RESPONSE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'affected_visas': {'type': 'array', 'items': {'type': 'string'}},
+        'impact_level': {'type': 'string'},
+        'summary': {'type': 'string'},
+        'action_items': {'type': 'array', 'items': {'type': 'string'}}
+    },
+    'required': ['affected_visas', 'impact_level', 'summary']
+}
+_POLICY_GENERATION_CONFIG = {
+    'response_mime_type': 'application/json',
+    'response_schema': POLICY_RESPONSE_SCHEMA
+}
+
+
+@lru_cache(maxsize=1)
+def _configure_genai(api_key: str):
+    """Import and configure the Gemini SDK once per container"""
+    import google.generativeai as genai
+    
+    genai.configure(api_key=api_key)
+    return genai
+
+
+@lru_cache(maxsize=1)
+def _get_model(api_key: str):
+    """Share one configured model across clients"""
+    genai = _configure_genai(api_key)
+    
+    # JSON mode - responses come back as bare JSON, no markdown fences
+    model = genai.GenerativeModel(
+        MODEL_NAME,
+        generation_config={'response_mime_type': 'application/json'}
+    )
+    return model
+
+
+@lru_cache(maxsize=8)
+def _get_instructed_model(api_key: str, system_instruction: str):
+    """Model with fixed system instructions, one per instruction text"""
+    genai = _configure_genai(api_key)
+    return genai.GenerativeModel(
+        MODEL_NAME,
+        system_instruction=system_instruction,
+        generation_config={'response_mime_type': 'application/json'}
+    )
+
 
 class AIClient:
     """Handles Google Gemini API interactions"""
@@ -22,14 +112,26 @@ class AIClient:
         if not api_key:
             raise ValueError("GEMINI_API_KEY environment variable required")
         
-        print(f"Configuring Gemini API with key: {api_key[:10]}...")
-        genai.configure(api_key=api_key)
+        self._api_key = api_key
+        self._model = None
+    
+    @property
+    def model(self):
+        """Gemini model, configured on first use so the SDK import stays off cold start"""
+        if self._model is None:
+            self._model = _get_model(self._api_key)
+            self.logger.info("Gemini SDK configured", model=MODEL_NAME)
+        return self._model
+    
+    def model_for(self, system_instruction: str):
+        """
+        Gemini model that sends the given instructions ahead of every prompt
         
-        # Use Gemini 2.5 Flash - latest free model
-        model_name = 'models/gemini-2.5-flash'
-        print(f"Initializing Gemini model: {model_name}")
-        self.model = genai.GenerativeModel(model_name)
-        print("Gemini model initialized successfully!")
+        Keeping the static scaffold in the system instruction gives each
+        request an identical prefix, which Gemini's implicit context cache
+        can reuse across calls.
+        """
+        return _get_instructed_model(self._api_key, system_instruction)
     
     def analyze_policy(self, title: str, content: str, max_retries: int = 3) -> dict:
         """
@@ -43,24 +145,32 @@ class AIClient:
             'action_items': ['Action 1', 'Action 2']
         }
         """
-        print(f"Starting policy analysis for: {title[:50]}...")
-        self.logger.info("Starting policy analysis", title=title, content_length=len(content))
+        self.logger.debug("Starting policy analysis", title=title, content_length=len(content))
         
         prompt = self._build_prompt(title, content)
         
+        cache_key = hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+        with _ANALYSIS_CACHE_LOCK:
+            cached = _ANALYSIS_CACHE.get(cache_key)
+            if cached is not None:
+                _ANALYSIS_CACHE.move_to_end(cache_key)
+        if cached is not None:
+            self.logger.debug("Reusing cached policy analysis", title=title)
+            return orjson.loads(cached)
+        
         for attempt in range(max_retries):
             try:
-                print(f"Calling Gemini API (attempt {attempt + 1}/{max_retries})")
-                self.logger.info(f"Calling Gemini API (attempt {attempt + 1}/{max_retries})")
+                self.logger.debug(f"Calling Gemini API (attempt {attempt + 1}/{max_retries})")
                 
-                response = self.model.generate_content(prompt)
-                
-                print("Gemini API call successful!")
-                self.logger.info("Gemini API call successful")
+                response = self.model.generate_content(prompt, generation_config=_POLICY_GENERATION_CONFIG)
                 
                 # Parse response
                 analysis = self._parse_response(response.text)
-                print(f"Analysis parsed: Impact={analysis.get('impact_level')}, Visas={analysis.get('affected_visas')}")
+                self.logger.debug(
+                    "Analysis parsed",
+                    impact_level=analysis.get('impact_level'),
+                    affected_visas=analysis.get('affected_visas')
+                )
                 
                 # Validate
                 validated = Validators.validate_policy_data({
@@ -68,17 +178,22 @@ class AIClient:
                     **analysis
                 })
                 
-                print("Validation successful!")
-                
-                return {
+                result = {
                     'affected_visas': validated['affected_visas'],
                     'impact_level': validated['impact_level'],
                     'summary': validated['summary'],
                     'action_items': validated.get('action_items', [])
                 }
+                
+                # Store the JSON text so every hit hands back a fresh dict
+                with _ANALYSIS_CACHE_LOCK:
+                    _ANALYSIS_CACHE[cache_key] = orjson.dumps(result)
+                    if len(_ANALYSIS_CACHE) > ANALYSIS_CACHE_MAX_SIZE:
+                        _ANALYSIS_CACHE.popitem(last=False)
+                
+                return result
             
             except Exception as e:
-                print(f"Gemini API error (attempt {attempt + 1}/{max_retries}): {str(e)[:200]}")
                 self.logger.error(f"Gemini API error (attempt {attempt + 1}/{max_retries})", error=e)
                 
                 if attempt == max_retries - 1:
@@ -95,53 +210,13 @@ class AIClient:
         if len(content) > max_length:
             content = content[:max_length] + "..."
         
-        return f"""Analyze this immigration policy announcement and provide structured analysis.
-
-POLICY TITLE:
-{title}
-
-POLICY CONTENT:
-{content}
-
-Provide your analysis in this EXACT JSON format:
-{{
-  "affected_visas": ["F-1", "OPT", "H-1B"],
-  "impact_level": "High",
-  "summary": "A 2-3 sentence plain English explanation",
-  "action_items": ["Specific action 1", "Specific action 2"]
-}}
-
-RULES:
-1. affected_visas: List visa types affected. Options: F-1, OPT, H-1B, L-1, O-1. Use empty array if none.
-2. impact_level: Must be exactly one of: Critical, High, Medium, Low
-   - Critical: Immediate action required, deadline-sensitive
-   - High: Significant changes affecting many people
-   - Medium: Moderate changes
-   - Low: Minor updates
-3. summary: Write for non-experts. Explain practical implications in 2-3 sentences.
-4. action_items: List 2-5 specific actionable steps. Use empty array if none needed.
-
-Return ONLY the JSON object, nothing else."""
+        return ''.join([_PROMPT_PREFIX, title, '\n\nPOLICY CONTENT:\n', content, _PROMPT_SUFFIX])
     
     def _parse_response(self, response_text: str) -> dict:
         """Parse Gemini response into structured data"""
         try:
-            print(f"Parsing Gemini response: {response_text[:200]}...")
-            response_text = response_text.strip()
-            
-            # Remove markdown code blocks
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.startswith('```'):
-                response_text = response_text[3:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            response_text = response_text.strip()
-            
             # Parse JSON
-            data = json.loads(response_text)
-            print("JSON parsed successfully!")
+            data = orjson.loads(response_text)
             
             # Validate required fields
             required = ['affected_visas', 'impact_level', 'summary']
@@ -158,12 +233,10 @@ Return ONLY the JSON object, nothing else."""
             
             return data
         
-        except json.JSONDecodeError as e:
-            print(f"JSON parse error: {str(e)}")
+        except orjson.JSONDecodeError as e:
             self.logger.error("Failed to parse Gemini response as JSON", response=response_text[:500], error=str(e))
             raise AIInvalidResponseError(f"Could not parse response: {str(e)}")
         
         except Exception as e:
-            print(f"Parse error: {str(e)}")
             self.logger.error("Error parsing Gemini response", error=e)
             raise AIInvalidResponseError(f"Parse error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Shared AWS Clients
+Cached per container so every handler reuses one client per service
+"""
+
+from functools import lru_cache
+
+import boto3
+from botocore.config import Config
+
+# Keep-alive and a larger pool let warm containers reuse TLS connections
+# instead of handshaking on every invocation; short connect timeout so a
+# bad endpoint fails fast instead of eating the Lambda timeout
+_CONFIG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=64,
+    connect_timeout=2,
+    read_timeout=30,
+    retries={'max_attempts': 3, 'mode': 'adaptive'}
+)
+
+# Best-effort writes (progress markers) give up after a single attempt
+_BEST_EFFORT_CONFIG = _CONFIG.merge(Config(retries={'max_attempts': 1, 'mode': 'standard'}))
+
+
+@lru_cache(maxsize=1)
+def get_s3():
+    """S3 client"""
+    return boto3.client('s3', config=_CONFIG)
+
+
+@lru_cache(maxsize=1)
+def get_textract():
+    """Textract client"""
+    return boto3.client('textract', config=_CONFIG)
+
+
+@lru_cache(maxsize=2)
+def get_dynamodb(best_effort: bool = False):
+    """DynamoDB service resource; best_effort disables retries"""
+    return boto3.resource('dynamodb', config=_BEST_EFFORT_CONFIG if best_effort else _CONFIG)
+
+
+@lru_cache(maxsize=1)
+def get_dynamodb_client():
+    """Low-level DynamoDB client, for reads that skip the resource layer"""
+    return boto3.client('dynamodb', config=_CONFIG)
+
+
+@lru_cache(maxsize=None)
+def get_table(table_name: str, best_effort: bool = False):
+    """DynamoDB Table resource, resolved once per table name"""
+    return get_dynamodb(best_effort).Table(table_name)
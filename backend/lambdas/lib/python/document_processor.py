@@ -9,13 +9,18 @@ This module provides robust document processing with:
 - Graceful degradation
 """
 
-import boto3
-import json
-import re
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional
 
+import orjson
+
 from ai_client import AIClient
+from aws_clients import get_textract
 from logger import get_logger
 from errors import AIError
 
@@ -26,8 +31,95 @@ MIN_CONFIDENCE_THRESHOLD = 0.75
 HIGH_CONFIDENCE_THRESHOLD = 0.90
 MAX_TEXT_LENGTH_FOR_AI = 8000
 
-# Textract client
-textract_client = boto3.client('textract')
+# Re-uploads and retries of the same I-20 reuse the earlier AI result.
+# Keyed by a digest of the text sent to Gemini; values are the response JSON
+STRUCTURE_CACHE_MAX_SIZE = 1024
+_STRUCTURE_CACHE = OrderedDict()
+_STRUCTURE_CACHE_LOCK = threading.Lock()
+
+# Fixed I-20 extraction instructions, sent as the model's system instruction
+# so every request shares the same cacheable prefix
+I20_EXTRACTION_INSTRUCTIONS = """Extract the following fields from the I-20 form text you are given.
+Return ONLY valid JSON with confidence scores (0.0 to 1.0) for each field.
+
+Required fields:
+- full_name: Student's full legal name
+- sevis_id: SEVIS ID number (format: N followed by 10 digits)
+- date_of_birth: Date of birth (YYYY-MM-DD format)
+- program_end_date: Program end date (YYYY-MM-DD format)
+- school_name: School/university name
+- degree_program: Degree and major (e.g., "Master of Science in Computer Science")
+- school_address: School's full address
+
+Return format:
+{
+  "full_name": {"value": "John Doe", "confidence": 0.95},
+  "sevis_id": {"value": "N0012345678", "confidence": 0.98},
+  "date_of_birth": {"value": "1995-06-15", "confidence": 0.90},
+  "program_end_date": {"value": "2025-12-15", "confidence": 0.92},
+  "school_name": {"value": "Northeastern University", "confidence": 0.99},
+  "degree_program": {"value": "Master of Science in Computer Science", "confidence": 0.93},
+  "school_address": {"value": "360 Huntington Ave, Boston, MA 02115", "confidence": 0.88}
+}
+
+Return ONLY the JSON object, nothing else."""
+
+# Fields every I-20 must yield, with the name shown in validation messages
+_REQUIRED_I20_FIELDS = (
+    ('full_name', 'Student name'),
+    ('sevis_id', 'SEVIS ID'),
+    ('program_end_date', 'Program end date'),
+    ('school_name', 'School name'),
+)
+
+# Per-document user turn; only the extracted text is substituted in
+_I20_PROMPT_TEMPLATE = "I-20 Text:\n%s"
+
+# Textract client - shared, thread-safe, with a pool sized for batch fan-out
+textract_client = get_textract()
+
+# Batch workers live for the container and match the client connection pool,
+# so every in-flight document has a connection and no pool is rebuilt per batch
+BATCH_MAX_WORKERS = 64
+_batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS)
+
+# Only Textract needs the full batch fan-out; Gemini calls in flight per
+# container share the same cap as the SQS document pipeline's
+GEMINI_MAX_CONCURRENCY = 8
+_gemini_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+
+
+@lru_cache(maxsize=101)
+def _pct(percent: int) -> str:
+    """Whole-number percentage label; confidences only span 0-100."""
+    return f'{percent}%'
+
+
+def _date_key(value: datetime) -> int:
+    """Date as a YYYYMMDD integer, which orders the same as the date."""
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def _parse_date_key(date_str: str) -> int:
+    """
+    Parse an ISO date into a YYYYMMDD integer.
+    
+    The AI is asked for YYYY-MM-DD, so slice that directly; anything else
+    goes through fromisoformat, which also raises the error for bad input.
+    """
+    if (
+        isinstance(date_str, str)
+        and len(date_str) == 10
+        and date_str[4] == '-'
+        and date_str[7] == '-'
+    ):
+        digits = date_str[:4] + date_str[5:7] + date_str[8:]
+        if digits.isascii() and digits.isdigit():
+            key = int(digits)
+            # Days past the 28th depend on the month, so leave those to fromisoformat
+            if 1 <= key // 100 % 100 <= 12 and 1 <= key % 100 <= 28:
+                return key
+    return _date_key(datetime.fromisoformat(date_str))
 
 
 class DocumentProcessor:
@@ -46,7 +138,7 @@ class DocumentProcessor:
     def __init__(self, logger=None):
         """Initialize DocumentProcessor."""
         self.logger = logger or get_logger()
-        self.ai_client = AIClient(logger=logger)
+        self.ai_client = AIClient(logger=self.logger)
         self.logger.info("DocumentProcessor initialized")
     
     def process_i20(self, s3_bucket: str, s3_key: str) -> Dict:
@@ -73,6 +165,61 @@ class DocumentProcessor:
         
         # Stage 1: Text Extraction
         extraction_result = self._extract_text(s3_bucket, s3_key)
+        return self._structure_and_validate(extraction_result)
+    
+    def start_i20_processing(self, s3_bucket: str, s3_key: str,
+                             sns_topic_arn: str, role_arn: str) -> str:
+        """
+        Start asynchronous I-20 processing for multi-page documents.
+        
+        Textract analyzes the pages on its side and publishes completion to
+        the SNS topic, so the caller does not block on OCR. Pass the JobId
+        from the notification to complete_i20_processing.
+        
+        Args:
+            s3_bucket: S3 bucket name containing the document
+            s3_key: S3 object key (path to document)
+            sns_topic_arn: Topic Textract notifies when the job finishes
+            role_arn: Role Textract assumes to publish to the topic
+        
+        Returns:
+            Textract JobId
+        """
+        
+        self.logger.info("Starting async Textract analysis", s3_bucket=s3_bucket, s3_key=s3_key)
+        
+        response = textract_client.start_document_analysis(
+            DocumentLocation={
+                'S3Object': {
+                    'Bucket': s3_bucket,
+                    'Name': s3_key
+                }
+            },
+            FeatureTypes=['FORMS', 'TABLES'],
+            NotificationChannel={
+                'SNSTopicArn': sns_topic_arn,
+                'RoleArn': role_arn
+            }
+        )
+        return response['JobId']
+    
+    def complete_i20_processing(self, job_id: str) -> Dict:
+        """
+        Finish I-20 processing once an async Textract job has completed.
+        
+        Args:
+            job_id: JobId returned by start_i20_processing
+        
+        Returns:
+            Same result dict as process_i20
+        """
+        
+        extraction_result = self._fetch_analysis_text(job_id)
+        return self._structure_and_validate(extraction_result)
+    
+    def _structure_and_validate(self, extraction_result: Dict) -> Dict:
+        """Run AI structuring and validation on a text extraction result."""
+        
         if not extraction_result['success']:
             return {
                 'status': 'extraction_failed',
@@ -96,9 +243,15 @@ class DocumentProcessor:
         # Stage 3: Validation
         validation_result = self._validate_i20_data(structured_data)
         
-        # Determine final status
-        critical_errors = [e for e in validation_result['errors'] if e.get('severity') == 'critical']
-        warning_errors = [e for e in validation_result['errors'] if e.get('severity') == 'warning']
+        # Determine final status - one pass splits errors by severity
+        critical_errors = []
+        warning_errors = []
+        for e in validation_result['errors']:
+            severity = e.get('severity')
+            if severity == 'critical':
+                critical_errors.append(e)
+            elif severity == 'warning':
+                warning_errors.append(e)
         
         if critical_errors:
             self.logger.warning(
@@ -136,6 +289,25 @@ class DocumentProcessor:
                 'stage': 'complete'
             }
     
+    def process_i20_batch(self, documents: List[tuple]) -> List[Dict]:
+        """
+        Process several I-20 forms concurrently.
+        
+        Textract and Gemini calls are network-bound, so documents are
+        processed on the shared batch pool instead of one after another.
+        Gemini calls still go through the GEMINI_MAX_CONCURRENCY slots.
+        
+        Args:
+            documents: List of (s3_bucket, s3_key) tuples
+        
+        Returns:
+            List of process_i20 results, in the same order as documents
+        """
+        
+        self.logger.info("Starting I-20 batch processing", document_count=len(documents))
+        
+        return list(_batch_executor.map(lambda doc: self.process_i20(*doc), documents))
+    
     def _extract_text(self, s3_bucket: str, s3_key: str) -> Dict:
         """
         Extract text from PDF using AWS Textract.
@@ -162,37 +334,12 @@ class DocumentProcessor:
             )
             
             # Extract text from all LINE blocks
-            text_blocks = []
-            for block in response.get('Blocks', []):
-                if block.get('BlockType') == 'LINE':
-                    text = block.get('Text', '')
-                    if text:
-                        text_blocks.append(text)
-            
-            raw_text = '\n'.join(text_blocks)
-            
-            self.logger.info(
-                "Textract extraction completed",
-                text_length=len(raw_text),
-                blocks_found=len(text_blocks)
+            raw_text = '\n'.join(
+                b['Text'] for b in response.get('Blocks', [])
+                if b.get('BlockType') == 'LINE' and b.get('Text')
             )
             
-            # Validate minimum text length
-            if len(raw_text) < MIN_TEXT_LENGTH:
-                self.logger.warning(
-                    "Extracted text too short",
-                    text_length=len(raw_text),
-                    minimum_required=MIN_TEXT_LENGTH
-                )
-                return {
-                    'success': False,
-                    'error': f'Could not extract enough text ({len(raw_text)} chars). Please upload a clear, readable PDF.'
-                }
-            
-            return {
-                'success': True,
-                'text': raw_text
-            }
+            return self._text_result(raw_text)
         
         except Exception as e:
             error_name = type(e).__name__
@@ -218,6 +365,76 @@ class DocumentProcessor:
                     'error': 'Text extraction failed. Please try a different file or contact support.'
                 }
     
+    def _fetch_analysis_text(self, job_id: str) -> Dict:
+        """
+        Collect LINE text from every page of a finished async Textract job.
+        
+        Args:
+            job_id: Textract JobId
+        
+        Returns:
+            Dict with 'success' (bool), 'text' (str) or 'error' (str)
+        """
+        
+        try:
+            self.logger.info("Fetching async Textract results", job_id=job_id)
+            
+            text_blocks = []
+            request = {'JobId': job_id}
+            while True:
+                response = textract_client.get_document_analysis(**request)
+                
+                if response.get('JobStatus') != 'SUCCEEDED':
+                    self.logger.error("Textract job did not succeed", job_id=job_id, job_status=response.get('JobStatus'))
+                    return {
+                        'success': False,
+                        'error': 'Text extraction failed. Please try a different file or contact support.'
+                    }
+                
+                text_blocks.extend(
+                    b['Text'] for b in response.get('Blocks', [])
+                    if b.get('BlockType') == 'LINE' and b.get('Text')
+                )
+                
+                if 'NextToken' not in response:
+                    break
+                request['NextToken'] = response['NextToken']
+            
+            return self._text_result('\n'.join(text_blocks))
+        
+        except Exception as e:
+            self.logger.error("Textract result retrieval failed", error=str(e), error_type=type(e).__name__)
+            return {
+                'success': False,
+                'error': 'Text extraction failed. Please try a different file or contact support.'
+            }
+    
+    def _text_result(self, raw_text: str) -> Dict:
+        """Check there is enough extracted text to structure."""
+        
+        self.logger.info(
+            "Textract extraction completed",
+            text_length=len(raw_text),
+            blocks_found=raw_text.count('\n') + 1 if raw_text else 0
+        )
+        
+        # Validate minimum text length
+        if len(raw_text) < MIN_TEXT_LENGTH:
+            self.logger.warning(
+                "Extracted text too short",
+                text_length=len(raw_text),
+                minimum_required=MIN_TEXT_LENGTH
+            )
+            return {
+                'success': False,
+                'error': f'Could not extract enough text ({len(raw_text)} chars). Please upload a clear, readable PDF.'
+            }
+        
+        return {
+            'success': True,
+            'text': raw_text
+        }
+    
     def _structure_i20_data(self, raw_text: str) -> Dict:
         """
         Use Gemini AI to extract structured fields from I-20 text.
@@ -239,11 +456,24 @@ class DocumentProcessor:
                     truncated_length=MAX_TEXT_LENGTH_FOR_AI
                 )
             
+            cache_key = hashlib.blake2b(text_to_process.encode(), digest_size=16).digest()
+            with _STRUCTURE_CACHE_LOCK:
+                cached = _STRUCTURE_CACHE.get(cache_key)
+                if cached is not None:
+                    _STRUCTURE_CACHE.move_to_end(cache_key)
+            if cached is not None:
+                self.logger.info("Reusing cached I-20 structuring result")
+                return {
+                    'success': True,
+                    'data': orjson.loads(cached)
+                }
+            
             prompt = self._build_i20_extraction_prompt(text_to_process)
             
             self.logger.info("Calling Gemini AI for I-20 structuring")
             
-            response = self.ai_client.model.generate_content(prompt)
+            with _gemini_slots:
+                response = self.ai_client.model_for(I20_EXTRACTION_INSTRUCTIONS).generate_content(prompt)
             response_text = response.text.strip()
             
             # Clean markdown code blocks
@@ -251,8 +481,8 @@ class DocumentProcessor:
             
             # Parse JSON
             try:
-                data = json.loads(response_text)
-            except json.JSONDecodeError as json_err:
+                data = orjson.loads(response_text)
+            except orjson.JSONDecodeError as json_err:
                 self.logger.error(
                     "Failed to parse AI response as JSON",
                     response_preview=response_text[:200],
@@ -268,6 +498,12 @@ class DocumentProcessor:
                 fields_extracted=len(data)
             )
             
+            # Store the JSON text so every hit hands back a fresh dict
+            with _STRUCTURE_CACHE_LOCK:
+                _STRUCTURE_CACHE[cache_key] = response_text
+                if len(_STRUCTURE_CACHE) > STRUCTURE_CACHE_MAX_SIZE:
+                    _STRUCTURE_CACHE.popitem(last=False)
+            
             return {
                 'success': True,
                 'data': data
@@ -292,46 +528,19 @@ class DocumentProcessor:
             }
     
     def _build_i20_extraction_prompt(self, text: str) -> str:
-        """Build prompt for Gemini AI to extract I-20 fields."""
-        
-        prompt = f"""Extract the following fields from this I-20 form text.
-Return ONLY valid JSON with confidence scores (0.0 to 1.0) for each field.
-
-Required fields:
-- full_name: Student's full legal name
-- sevis_id: SEVIS ID number (format: N followed by 10 digits)
-- date_of_birth: Date of birth (YYYY-MM-DD format)
-- program_end_date: Program end date (YYYY-MM-DD format)
-- school_name: School/university name
-- degree_program: Degree and major (e.g., "Master of Science in Computer Science")
-- school_address: School's full address
-
-Return format:
-{{
-  "full_name": {{"value": "John Doe", "confidence": 0.95}},
-  "sevis_id": {{"value": "N0012345678", "confidence": 0.98}},
-  "date_of_birth": {{"value": "1995-06-15", "confidence": 0.90}},
-  "program_end_date": {{"value": "2025-12-15", "confidence": 0.92}},
-  "school_name": {{"value": "Northeastern University", "confidence": 0.99}},
-  "degree_program": {{"value": "Master of Science in Computer Science", "confidence": 0.93}},
-  "school_address": {{"value": "360 Huntington Ave, Boston, MA 02115", "confidence": 0.88}}
-}}
-
-I-20 Text:
-{text}
-
-Return ONLY the JSON object, nothing else."""
-        
-        return prompt
+        """Build the per-document part of the I-20 extraction prompt."""
+        return _I20_PROMPT_TEMPLATE % text
     
     def _clean_ai_response(self, response_text: str) -> str:
         """Clean AI response by removing markdown code blocks."""
         
-        if response_text.startswith('```json'):
-            response_text = response_text[7:]
-        elif response_text.startswith('```'):
-            response_text = response_text[3:]
+        response_text = response_text.strip()
         
+        # JSON mode replies are usually unfenced - return them untouched
+        if not response_text.startswith('```'):
+            return response_text
+        
+        response_text = response_text[7:] if response_text.startswith('```json') else response_text[3:]
         if response_text.endswith('```'):
             response_text = response_text[:-3]
         
@@ -349,18 +558,13 @@ Return ONLY the JSON object, nothing else."""
         """
         
         errors = []
-        
-        # Required fields
-        required_fields = {
-            'full_name': 'Student name',
-            'sevis_id': 'SEVIS ID',
-            'program_end_date': 'Program end date',
-            'school_name': 'School name'
-        }
+        # One clock read per document; the date checks reuse it
+        now = datetime.now()
         
         # Check for missing fields
-        for field, display_name in required_fields.items():
-            if field not in data:
+        for field, display_name in _REQUIRED_I20_FIELDS:
+            entry = data.get(field)
+            if entry is None:
                 errors.append({
                     'field': field,
                     'severity': 'critical',
@@ -370,14 +574,14 @@ Return ONLY the JSON object, nothing else."""
                 continue
             
             # Check confidence threshold
-            confidence = data[field].get('confidence', 0)
+            confidence = entry.get('confidence', 0)
             if confidence < MIN_CONFIDENCE_THRESHOLD:
                 errors.append({
                     'field': field,
                     'severity': 'warning',
-                    'message': f'Low confidence ({confidence:.0%}) for {display_name}',
+                    'message': f'Low confidence ({_pct(round(confidence * 100))}) for {display_name}',
                     'suggestion': 'Please verify this value is correct',
-                    'value': data[field].get('value')
+                    'value': entry.get('value')
                 })
         
         # Validate SEVIS ID format
@@ -394,7 +598,7 @@ Return ONLY the JSON object, nothing else."""
         
         # Validate program end date
         if 'program_end_date' in data:
-            date_errors = self._validate_program_end_date(data['program_end_date'].get('value'))
+            date_errors = self._validate_program_end_date(data['program_end_date'].get('value'), now)
             errors.extend(date_errors)
         
         # Validate name
@@ -419,31 +623,40 @@ Return ONLY the JSON object, nothing else."""
                     'value': school
                 })
         
+        critical_count = sum(1 for e in errors if e['severity'] == 'critical')
         self.logger.info(
             "Validation completed",
             total_errors=len(errors),
-            critical_errors=len([e for e in errors if e['severity'] == 'critical']),
-            warnings=len([e for e in errors if e['severity'] == 'warning'])
+            critical_errors=critical_count,
+            warnings=len(errors) - critical_count
         )
         
         return {'errors': errors}
     
     def _validate_sevis_format(self, sevis_id: str) -> bool:
         """Validate SEVIS ID format (N + 10 digits)."""
-        pattern = r'^N\d{10}$'
-        return bool(re.match(pattern, sevis_id))
+        # Fixed-width format, so a direct check beats the regex engine;
+        # isascii() keeps non-ASCII digits that isdigit() accepts out
+        return (
+            isinstance(sevis_id, str)
+            and len(sevis_id) == 11
+            and sevis_id[0] == 'N'
+            and sevis_id.isascii()
+            and sevis_id[1:].isdigit()
+        )
     
-    def _validate_program_end_date(self, date_str: str) -> List[Dict]:
+    def _validate_program_end_date(self, date_str: str, now: Optional[datetime] = None) -> List[Dict]:
         """Validate program end date is logical and in expected range."""
         errors = []
+        today = now or datetime.now()
         
         try:
-            end_date = datetime.fromisoformat(date_str)
-            today = datetime.now()
+            end_key = _parse_date_key(date_str)
             
-            # Check if date is too far in the past (> 2 years)
-            two_years_ago = today - timedelta(days=730)
-            if end_date < two_years_ago:
+            # Check if date is too far in the past (> 2 years); the end date is
+            # midnight, so the bound day itself already falls before it
+            two_years_ago = _date_key(today - timedelta(days=730))
+            if end_key <= two_years_ago:
                 errors.append({
                     'field': 'program_end_date',
                     'severity': 'warning',
@@ -453,8 +666,8 @@ Return ONLY the JSON object, nothing else."""
                 })
             
             # Check if date is too far in future (> 6 years)
-            six_years_from_now = today + timedelta(days=2190)
-            if end_date > six_years_from_now:
+            six_years_from_now = _date_key(today + timedelta(days=2190))
+            if end_key > six_years_from_now:
                 errors.append({
                     'field': 'program_end_date',
                     'severity': 'warning',
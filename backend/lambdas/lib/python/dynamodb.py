@@ -2,29 +2,75 @@
 DynamoDB Repository for Policy Operations
 """
 
-import boto3
+import heapq
 import os
+from itertools import islice
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from decimal import Decimal
-from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.conditions import Attr, Key
+from aws_clients import get_table
 from errors import DuplicatePolicyError, DatabaseError
 from logger import get_logger
 
-dynamodb = boto3.resource('dynamodb')
-policies_table = dynamodb.Table(os.environ.get('POLICIES_TABLE', 'immigration-policies'))
+# Shared keep-alive resource from aws_clients, so warm containers skip the
+# TLS handshake on their first read or write
+policies_table = get_table(os.environ.get('POLICIES_TABLE', 'immigration-policies'))
+
+# How far the PoliciesTable index rollout has got (template parameter
+# PoliciesIndexStage): 1 adds title-status-index, 2 impact-date-index and
+# 3 status-date-index. Indexes up to the deployed stage are queried; the
+# rest fall back to scanning, so code never queries an index that is not there
+POLICY_INDEX_STAGE = int(os.environ.get('POLICY_INDEX_STAGE', '3'))
+TITLE_STATUS_INDEX_STAGE = 1
+IMPACT_DATE_INDEX_STAGE = 2
+STATUS_DATE_INDEX_STAGE = 3
+
+# Everything list callers use - raw_content can run to kilobytes and is left out.
+# The listing GSIs project exactly these fields (template.yaml); keep them in step
+POLICY_LIST_PROJECTION = (
+    'policy_id, #t, #sm, impact_level, affected_visas, action_items, '
+    'source_url, published_date, scraped_at, #s'
+)
+POLICY_LIST_ATTRIBUTE_NAMES = {'#t': 'title', '#sm': 'summary', '#s': 'status'}
+
+# Items DynamoDB evaluates per page when a visa filter thins the results.
+# Limit counts items read before the filter, so a page of just `limit`
+# items can come back nearly empty and cost a round trip per few matches
+FILTERED_PAGE_SIZE = 50
+
+# Duplicate-title lookups for a scrape batch run side by side
+_query_executor = ThreadPoolExecutor(max_workers=10)
+
+# Titles this container has seen stored. The scraper re-reads the same
+# news rows run after run and saved policies live for a year, so warm
+# containers answer most duplicate checks without an index query
+KNOWN_TITLES_MAX_SIZE = 512
+_KNOWN_TITLES = {}  # title -> None, in insertion order
+
+# Full-table reads split into this many parallel scan segments. Each segment
+# reads at full speed, so raise it only while the table has RCU to spare
+SCAN_SEGMENTS = 4
+_scan_executor = ThreadPoolExecutor(max_workers=SCAN_SEGMENTS)
 
 
 def decimal_to_native(obj):
     """Convert DynamoDB Decimal to native types"""
-    if isinstance(obj, list):
-        return [decimal_to_native(i) for i in obj]
-    elif isinstance(obj, dict):
+    # Exact type checks - the resource layer only returns plain dict/list/Decimal,
+    # and most policy fields are strings that fall straight through
+    t = type(obj)
+    if t is dict:
         return {k: decimal_to_native(v) for k, v in obj.items()}
-    elif isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    else:
-        return obj
+    if t is list:
+        return [decimal_to_native(i) for i in obj]
+    if t is Decimal:
+        # A non-negative exponent is always integral; only fractional-looking
+        # values like 2.0 need the slower modulo check
+        if obj.as_tuple().exponent >= 0 or obj % 1 == 0:
+            return int(obj)
+        return float(obj)
+    return obj
 
 
 class PolicyRepository:
@@ -37,35 +83,17 @@ class PolicyRepository:
     def save_policy(self, policy: dict, check_duplicate: bool = True) -> str:
         """Save policy to DynamoDB"""
         try:
-            policy_id = str(uuid.uuid4())
-            timestamp = datetime.utcnow().isoformat() + 'Z'
-            
             # Check duplicates
             if check_duplicate:
                 if self.check_duplicate(policy['title']):
                     self.logger.warning("Duplicate policy", title=policy['title'])
                     raise DuplicatePolicyError(f"Policy exists: {policy['title']}")
             
-            # Prepare item
-            item = {
-                'policy_id': policy_id,
-                'title': policy['title'],
-                'summary': policy['summary'],
-                'impact_level': policy['impact_level'],
-                'affected_visas': policy['affected_visas'],
-                'action_items': policy.get('action_items', []),
-                'source_url': policy.get('source_url', ''),
-                'raw_content': policy.get('raw_content', ''),
-                'published_date': policy.get('published_date', timestamp),
-                'scraped_at': timestamp,
-                'status': 'active',
-                'expires_at': int((datetime.utcnow() + timedelta(days=365)).timestamp())
-            }
-            
+            item = self._build_item(policy, datetime.utcnow())
             self.table.put_item(Item=item)
             
-            self.logger.info("Policy saved", policy_id=policy_id, title=policy['title'])
-            return policy_id
+            self.logger.info("Policy saved", policy_id=item['policy_id'], title=policy['title'])
+            return item['policy_id']
         
         except DuplicatePolicyError:
             raise
@@ -73,53 +101,245 @@ class PolicyRepository:
             self.logger.error("Error saving policy", error=e)
             raise DatabaseError(f"Failed to save: {str(e)}")
     
+    def save_policies(self, policies: list, check_duplicate: bool = False) -> list:
+        """
+        Save several policies with batched writes
+        
+        Returns the new policy_id for each input policy, or None where it
+        was skipped as a duplicate
+        """
+        try:
+            # Repeats within the batch keep only their first occurrence
+            existing = self.find_existing_titles(p['title'] for p in policies) if check_duplicate else set()
+            
+            now = datetime.utcnow()
+            policy_ids = []
+            # batch_writer sends 25-item BatchWriteItem calls and resends
+            # unprocessed items itself
+            with self.table.batch_writer() as batch:
+                for policy in policies:
+                    if policy['title'] in existing:
+                        self.logger.warning("Duplicate policy", title=policy['title'])
+                        policy_ids.append(None)
+                        continue
+                    if check_duplicate:
+                        existing.add(policy['title'])
+                    item = self._build_item(policy, now)
+                    batch.put_item(Item=item)
+                    policy_ids.append(item['policy_id'])
+            
+            for policy, policy_id in zip(policies, policy_ids):
+                if policy_id:
+                    _remember_title(policy['title'])
+            
+            self.logger.info("Policies saved", saved=sum(1 for p in policy_ids if p), total=len(policies))
+            return policy_ids
+        
+        except Exception as e:
+            self.logger.error("Error saving policies", error=e)
+            raise DatabaseError(f"Failed to save: {str(e)}")
+    
+    def _build_item(self, policy: dict, now: datetime) -> dict:
+        """DynamoDB item for a new policy, stamped with now"""
+        timestamp = now.isoformat() + 'Z'
+        return {
+            'policy_id': str(uuid.uuid4()),
+            'title': policy['title'],
+            'summary': policy['summary'],
+            'impact_level': policy['impact_level'],
+            'affected_visas': policy['affected_visas'],
+            'action_items': policy.get('action_items', []),
+            'source_url': policy.get('source_url', ''),
+            'raw_content': policy.get('raw_content', ''),
+            'published_date': policy.get('published_date', timestamp),
+            'scraped_at': timestamp,
+            'status': 'active',
+            'expires_at': int((now + timedelta(days=365)).timestamp())
+        }
+    
     def get_policies(self, visa_type: str = None, impact_level: str = None, 
                      days: int = None, limit: int = 10):
         """Get policies with filters"""
         try:
             self.logger.info("Querying policies", visa_type=visa_type, limit=limit)
             
-            # Build filter
-            filter_expr = Attr('status').eq('active')
-            
+            cutoff = None
             if days:
                 cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat() + 'Z'
-                filter_expr = filter_expr & Attr('published_date').gte(cutoff)
-            
-            if impact_level:
-                filter_expr = filter_expr & Attr('impact_level').eq(impact_level)
-            
-            # Scan table
-            response = self.table.scan(FilterExpression=filter_expr, Limit=limit * 2)
-            
-            policies = response.get('Items', [])
             
-            # Client-side filter for visa_type (it's a list)
-            if visa_type:
-                policies = [p for p in policies if visa_type in p.get('affected_visas', [])]
-            
-            # Sort by date (newest first)
-            policies.sort(key=lambda x: x.get('published_date', ''), reverse=True)
-            
-            # Apply limit
-            policies = policies[:limit]
+            if POLICY_INDEX_STAGE < (IMPACT_DATE_INDEX_STAGE if impact_level else STATUS_DATE_INDEX_STAGE):
+                policies = self._scan_newest(impact_level, cutoff, visa_type, limit)
+            elif impact_level:
+                policies = self._query_newest(
+                    'impact-date-index', Key('impact_level').eq(impact_level), cutoff, visa_type, limit,
+                    only_active=True
+                )
+            else:
+                # Every active policy shares one partition of the status index,
+                # already ordered newest first
+                policies = self._query_newest(
+                    'status-date-index', Key('status').eq('active'), cutoff, visa_type, limit
+                )
             
             self.logger.info(f"Retrieved {len(policies)} policies")
             
-            return [decimal_to_native(p) for p in policies]
+            # The list projection holds only strings and string lists, so
+            # there are no Decimals to convert and the items go out as read
+            return policies
         
         except Exception as e:
             self.logger.error("Error querying policies", error=e)
             raise DatabaseError(f"Query failed: {str(e)}")
     
+    def _query_newest(self, index_name: str, key_condition, cutoff: str, visa_type: str, limit: int,
+                      only_active: bool = False) -> list:
+        """Newest policies in one partition of a published_date-sorted index, up to limit matches"""
+        if cutoff:
+            key_condition = key_condition & Key('published_date').gte(cutoff)
+        
+        filter_expr = Attr('status').eq('active') if only_active else None
+        if visa_type:
+            # contains() on a list attribute matches an element, so the visa
+            # check runs server-side and non-matching items never come back
+            visa_filter = Attr('affected_visas').contains(visa_type)
+            filter_expr = visa_filter if filter_expr is None else filter_expr & visa_filter
+        
+        query_kwargs = {
+            'IndexName': index_name,
+            'KeyConditionExpression': key_condition,
+            'ProjectionExpression': POLICY_LIST_PROJECTION,
+            # Copied because boto3 merges the expressions' placeholders into it
+            'ExpressionAttributeNames': dict(POLICY_LIST_ATTRIBUTE_NAMES),
+            'ScanIndexForward': False,  # Newest first
+            # GSIs only serve eventually consistent reads, at half the RCU of
+            # strong ones; spelled out so nobody flips it on the base table
+            'ConsistentRead': False,
+            # Paging stops once limit matches are in hand, however large the page
+            'Limit': max(limit, FILTERED_PAGE_SIZE) if visa_type else limit
+        }
+        if filter_expr is not None:
+            query_kwargs['FilterExpression'] = filter_expr
+        
+        policies = []
+        while True:
+            response = self.table.query(**query_kwargs)
+            policies.extend(response.get('Items', []))
+            if len(policies) >= limit or 'LastEvaluatedKey' not in response:
+                return policies[:limit]
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    def _scan_newest(self, impact_level: str, cutoff: str, visa_type: str, limit: int) -> list:
+        """Newest matching policies from a whole-table scan, for before the listing indexes exist"""
+        matches = (
+            p for p in self.scan_policies(list_fields_only=True)
+            if p.get('status') == 'active'
+            and (not impact_level or p.get('impact_level') == impact_level)
+            and (not cutoff or p.get('published_date', '') >= cutoff)
+            and (not visa_type or visa_type in p.get('affected_visas', []))
+        )
+        return list(islice(matches, limit))
+    
+    def scan_policies(self, total_segments: int = SCAN_SEGMENTS, list_fields_only: bool = False) -> list:
+        """
+        Every policy in the table, newest first
+        
+        For whole-table jobs such as reindexing. The table is read as
+        total_segments parallel scan segments; each is sorted as it
+        completes and the sorted runs are merged. list_fields_only skips
+        raw_content and reads just the list projection.
+        """
+        try:
+            runs = _scan_executor.map(
+                lambda segment: self._scan_segment(segment, total_segments, list_fields_only),
+                range(total_segments)
+            )
+            merged = heapq.merge(*runs, key=lambda x: x.get('published_date', ''), reverse=True)
+            policies = [decimal_to_native(p) for p in merged]
+            
+            self.logger.info("Scanned policies table", segments=total_segments, policies=len(policies))
+            return policies
+        
+        except Exception as e:
+            self.logger.error("Error scanning policies", error=e)
+            raise DatabaseError(f"Scan failed: {str(e)}")
+    
+    def _scan_segment(self, segment: int, total_segments: int, list_fields_only: bool) -> list:
+        """All items in one scan segment, newest first"""
+        scan_kwargs = {
+            'Segment': segment,
+            'TotalSegments': total_segments,
+            'ConsistentRead': False
+        }
+        if list_fields_only:
+            scan_kwargs['ProjectionExpression'] = POLICY_LIST_PROJECTION
+            scan_kwargs['ExpressionAttributeNames'] = POLICY_LIST_ATTRIBUTE_NAMES
+        
+        items = []
+        while True:
+            response = self.table.scan(**scan_kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        items.sort(key=lambda x: x.get('published_date', ''), reverse=True)
+        return items
+    
+    def find_existing_titles(self, titles) -> set:
+        """
+        The titles among titles that already have an active policy
+        
+        Titles this container already knows are answered from memory; the
+        rest are looked up on the title index side by side, one round trip
+        of wall time for the whole batch
+        """
+        existing = set()
+        unknown = []
+        for title in dict.fromkeys(titles):
+            if title in _KNOWN_TITLES:
+                existing.add(title)
+            else:
+                unknown.append(title)
+        
+        for title, found in zip(unknown, _query_executor.map(self.check_duplicate, unknown)):
+            if found:
+                existing.add(title)
+                _remember_title(title)
+        return existing
+    
     def check_duplicate(self, title: str) -> bool:
         """Check if policy with title exists"""
         try:
-            response = self.table.scan(
-                FilterExpression=Attr('title').eq(title) & Attr('status').eq('active'),
-                Limit=1
-            )
-            return len(response.get('Items', [])) > 0
+            if POLICY_INDEX_STAGE >= TITLE_STATUS_INDEX_STAGE:
+                # Index lookup instead of a full-table scan
+                response = self.table.query(
+                    IndexName='title-status-index',
+                    KeyConditionExpression=Key('title').eq(title) & Key('status').eq('active'),
+                    Limit=1
+                )
+                return len(response.get('Items', [])) > 0
+            
+            # Scan Limit caps items read, not matches, so page until one turns up
+            scan_kwargs = {
+                'FilterExpression': Attr('title').eq(title) & Attr('status').eq('active'),
+                'ProjectionExpression': 'policy_id'
+            }
+            while True:
+                response = self.table.scan(**scan_kwargs)
+                if response.get('Items'):
+                    return True
+                if 'LastEvaluatedKey' not in response:
+                    return False
+                scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
         except Exception as e:
+            # Treating a failed check as 'not a duplicate' would re-save it
             self.logger.error("Error checking duplicate", error=e)
-            return False
\ No newline at end of file
+            raise DatabaseError(f"Duplicate check failed: {str(e)}")
+
+
+def _remember_title(title: str):
+    """Record a stored title, evicting the oldest once the cache is full"""
+    _KNOWN_TITLES.pop(title, None)
+    if len(_KNOWN_TITLES) >= KNOWN_TITLES_MAX_SIZE:
+        del _KNOWN_TITLES[next(iter(_KNOWN_TITLES))]
+    _KNOWN_TITLES[title] = None
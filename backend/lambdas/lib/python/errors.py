@@ -2,19 +2,26 @@
 Custom Exception Classes for Immigration AI Backend
 """
 
+from types import MappingProxyType
+
+
 class ImmigrationAIError(Exception):
     """Base exception for all Immigration AI errors"""
+    
+    # Shared read-only details for errors raised without any
+    _EMPTY = MappingProxyType({})
+    
     def __init__(self, message: str, code: str = "UNKNOWN_ERROR", details: dict = None):
         self.message = message
         self.code = code
-        self.details = details or {}
+        self.details = details if details is not None else self._EMPTY
         super().__init__(self.message)
     
     def to_dict(self):
         return {
             'code': self.code,
             'message': self.message,
-            'details': self.details
+            'details': dict(self.details)
         }
 
 
@@ -40,6 +47,12 @@ class AITimeoutError(AIError):
         super().__init__(message, "AI_TIMEOUT", details)
 
 
+class AIRateLimitError(AIError):
+    """AI API kept rejecting requests for exceeding its rate limit"""
+    def __init__(self, message: str = "AI API rate limit exceeded", details: dict = None):
+        super().__init__(message, "AI_RATE_LIMITED", details)
+
+
 class AIInvalidResponseError(AIError):
     """AI returned invalid response"""
     def __init__(self, message: str = "Invalid AI response", details: dict = None):
@@ -2,14 +2,24 @@
 Structured Logging for Immigration AI Backend
 """
 
-import json
 import logging
+import os
 import sys
 from datetime import datetime
 import uuid
 
+import orjson
+
 logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
 logger = logging.getLogger('immigration-ai')
+# Lambda installs a root handler first, so basicConfig alone sets no level;
+# LOG_LEVEL=WARNING quiets per-item traces in production
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+
+def _dumps(obj) -> bytes:
+    # Extras can carry non-string keys or values orjson has no encoder for
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
 
 
 class StructuredLogger:
@@ -18,23 +28,41 @@ class StructuredLogger:
     def __init__(self, correlation_id: str = None):
         self.correlation_id = correlation_id or str(uuid.uuid4())
         self.context = {}
+        self._refresh_context_fragment()
+    
+    def set_correlation_id(self, correlation_id: str):
+        """Rebind a long-lived logger to the current request"""
+        self.correlation_id = correlation_id
+        self._refresh_context_fragment()
     
     def add_context(self, **kwargs):
         self.context.update(kwargs)
+        self._refresh_context_fragment()
+    
+    def _refresh_context_fragment(self):
+        # correlation_id and context are the same on every line, so they are
+        # serialized once here and spliced into each entry without braces
+        self._context_fragment = _dumps({'correlation_id': self.correlation_id, **self.context})[1:-1]
     
     def _format_log(self, level: str, message: str, extra: dict = None) -> str:
-        log_entry = {
+        head = _dumps({
             'timestamp': datetime.utcnow().isoformat() + 'Z',
             'level': level,
-            'message': message,
-            'correlation_id': self.correlation_id,
-            **self.context
-        }
+            'message': message
+        })
+        parts = [head[:-1], b',', self._context_fragment]
         if extra:
-            log_entry['extra'] = extra
-        return json.dumps(log_entry)
+            parts += [b',"extra":', _dumps(extra)]
+        parts.append(b'}')
+        return b''.join(parts).decode()
+    
+    def is_enabled_for(self, level: int) -> bool:
+        """Whether a record at this stdlib logging level would be emitted"""
+        return logger.isEnabledFor(level)
     
     def info(self, message: str, **kwargs):
+        if not logger.isEnabledFor(logging.INFO):
+            return
         logger.info(self._format_log('INFO', message, kwargs if kwargs else None))
     
     def warning(self, message: str, **kwargs):
@@ -50,6 +78,9 @@ class StructuredLogger:
         logger.error(self._format_log('ERROR', message, extra))
     
     def debug(self, message: str, **kwargs):
+        # Skip building the JSON line entirely when debug output is off
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
         logger.debug(self._format_log('DEBUG', message, kwargs if kwargs else None))
 
 
@@ -2,19 +2,101 @@
 USCIS Web Scraper with Retry Logic
 """
 
+import logging
+import random
+import re
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+import soupsieve
+import threading
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from urllib.parse import urljoin
 from errors import USCISUnreachableError
 from logger import get_logger
 
+# The news index only needs a few CSS lookups per row, which selectolax's C
+# engine does far faster than BeautifulSoup; without it the BeautifulSoup path
+# below is used
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+# lxml's C parser is much faster than html.parser; it ships in the layer,
+# but fall back rather than fail if a build ever leaves it out
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
 USCIS_NEWS_URL = "https://www.uscis.gov/newsroom/news-releases"
 USCIS_BASE_URL = "https://www.uscis.gov"
 MAX_RETRIES = 3
 RETRY_DELAY = 2
 REQUEST_TIMEOUT = 30
+# Longest Retry-After from a 429/503 that is waited out in-process
+RETRY_AFTER_MAX = 30
+
+# Articles read from the top of the news index per scrape
+MAX_ARTICLES = 20
+# Opening tag of an article row, matched on the raw bytes while streaming
+_ROW_MARKER = re.compile(rb'<div[^>]*class="(?:[^"]*\s)?views-row[\s"]')
+_ROW_MARKER_OVERLAP = 256
+
+# Policy pages are fetched side by side; the session pool holds one
+# connection per worker so no fetch waits on a connection
+FETCH_MAX_WORKERS = 10
+_fetch_executor = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS)
+
+# Validators and parsed results of pages that sent ETag/Last-Modified, kept
+# per warm container so the next fetch of the same URL is a conditional GET
+# and a 304 reuses the earlier parse. Oldest entry goes first when full.
+CONDITIONAL_CACHE_MAX_SIZE = 64
+_conditional_cache = {}  # url -> (conditional request headers, parsed result)
+_conditional_cache_lock = threading.Lock()
+
+IMMIGRATION_KEYWORDS = (
+    'visa', 'immigration', 'opt', 'h-1b', 'f-1', 'stem',
+    'work authorization', 'ead', 'i-20', 'i-797', 'green card',
+    'petition', 'nonimmigrant', 'employment', 'temporary protected status',
+    'tps', 'asylum', 'refugee', 'naturalization', 'citizenship'
+)
+# One alternation scans each title once instead of once per keyword; no word
+# boundaries, so it matches substrings exactly like the old `in` checks
+_IMMIGRATION_RE = re.compile('|'.join(map(re.escape, IMMIGRATION_KEYWORDS)), re.IGNORECASE)
+
+# Only article rows are turned into tree nodes; navigation, scripts and the
+# footer of the news page are skipped while parsing
+_ARTICLE_STRAINER = SoupStrainer('div', class_='views-row')
+
+# Per-article fields, compiled once; each is fetched in one descendant walk
+# instead of a find for the wrapper div and another inside it
+_TITLE_LINK_SELECTOR = soupsieve.compile('div.views-field-title a')
+_DATE_TIME_SELECTOR = soupsieve.compile('div.views-field-field-display-date time')
+
+
+@lru_cache(maxsize=1)
+def get_session() -> requests.Session:
+    """HTTP session shared by every scraper in the container"""
+    # Outlives single invocations so warm runs reuse kept-alive USCIS connections
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Immigration-AI-Bot/1.0',
+        'Accept': 'text/html,application/xhtml+xml',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'
+    })
+    # Pool sized for concurrent page fetches; _make_request does its own retries
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=FETCH_MAX_WORKERS, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
 
 class USCISScraper:
@@ -22,165 +104,332 @@ class USCISScraper:
     
     def __init__(self, logger=None):
         self.logger = logger or get_logger()
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Immigration-AI-Bot/1.0',
-            'Accept': 'text/html,application/xhtml+xml'
-        })
+        self.session = get_session()
     
-    def _make_request(self, url: str, retries: int = MAX_RETRIES):
-        """Make HTTP request with retry logic"""
+    def _make_request(self, url: str, retries: int = MAX_RETRIES, stream: bool = False,
+                      headers: dict = None):
+        """
+        Make HTTP request with retry logic
+        
+        stream leaves the body unread for the caller to consume and close
+        """
         for attempt in range(retries):
             try:
-                print(f"Fetching URL (attempt {attempt + 1}/{retries}): {url}")
-                
-                response = self.session.get(url, timeout=REQUEST_TIMEOUT)
-                response.raise_for_status()
+                response = self.session.get(url, timeout=REQUEST_TIMEOUT, headers=headers, stream=stream)
+                try:
+                    response.raise_for_status()
+                except requests.HTTPError:
+                    # A streamed error body is never read, so hand the connection back now
+                    response.close()
+                    raise
                 
-                print(f"Request successful: {response.status_code}")
+                self.logger.debug("Fetched URL", url=url, attempt=attempt + 1, status_code=response.status_code)
                 return response
             
             except requests.Timeout:
-                print(f"Timeout (attempt {attempt + 1}/{retries})")
+                self.logger.warning("Request timed out", url=url, attempt=attempt + 1, retries=retries)
                 if attempt == retries - 1:
                     raise USCISUnreachableError(f"Timeout after {retries} attempts")
-                time.sleep(RETRY_DELAY * (2 ** attempt))
+                # A slow server needs room, so timeouts get the full backoff window
+                time.sleep(_backoff_delay(attempt))
             
             except requests.RequestException as e:
-                print(f"Request failed (attempt {attempt + 1}/{retries}): {str(e)}")
+                self.logger.warning("Request failed", url=url, attempt=attempt + 1, retries=retries, error=str(e))
                 if attempt == retries - 1:
                     raise USCISUnreachableError(f"Failed after {retries} attempts: {str(e)}")
-                time.sleep(RETRY_DELAY * (2 ** attempt))
+                time.sleep(self._retry_delay(e, attempt))
         
         raise USCISUnreachableError("Request failed")
     
+    def _fetch_parsed(self, url: str, parse, stream: bool = False):
+        """
+        Fetch url and run parse on the response, reusing the last parse on a 304
+        
+        Returns:
+            Tuple of (parsed result, modified) where modified is False on a 304
+        """
+        with _conditional_cache_lock:
+            cached = _conditional_cache.get(url)
+        
+        response = self._make_request(url, stream=stream, headers=cached[0] if cached else None)
+        try:
+            if response.status_code == 304 and cached is not None:
+                self.logger.debug("URL not modified", url=url)
+                return cached[1], False
+            result = parse(response)
+        finally:
+            response.close()
+        
+        validators = _conditional_headers(response.headers)
+        if validators:
+            _remember_result(url, validators, result)
+        return result, True
+    
+    def _retry_delay(self, error: requests.RequestException, attempt: int) -> float:
+        """Seconds to wait before retrying after a non-timeout failure"""
+        response = getattr(error, 'response', None)
+        status_code = response.status_code if response is not None else None
+        
+        if status_code in (429, 503):
+            retry_after = _retry_after_seconds(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                self.logger.debug("Honoring Retry-After", status_code=status_code, delay=retry_after)
+                return retry_after
+        
+        # Dropped connections and 5xx usually clear within moments, so retry
+        # soon rather than waiting out the whole window
+        if isinstance(error, requests.ConnectionError) or (status_code is not None and status_code >= 500):
+            return _backoff_delay(attempt) / 4
+        return _backoff_delay(attempt)
+    
     def scrape_news_page(self):
         """Scrape USCIS news page for policy announcements"""
         try:
-            print("Starting USCIS news page scrape...")
-            
-            response = self._make_request(USCIS_NEWS_URL)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            policies = []
-            
-            # USCIS uses div.views-row for articles
-            print("Looking for articles with class 'views-row'...")
+            policies, modified = self._fetch_parsed(USCIS_NEWS_URL, self._parse_news_listing, stream=True)
+            if not modified:
+                self.logger.info("USCIS news page unchanged", immigration_policies=len(policies))
+            # The cached list is reused by later scrapes, so callers get copies
+            return [dict(p) for p in policies]
+        
+        except Exception as e:
+            self.logger.error("Error in scrape_news_page", error=e)
+            raise
+    
+    def _parse_news_listing(self, response) -> list:
+        """Immigration-related policies listed on a streamed news page response"""
+        content = self._read_news_listing(response)
+        policies = []
+        
+        # USCIS uses div.views-row for articles
+        if HTMLParser is not None:
+            articles = HTMLParser(content).css('div.views-row')
+            read_article = _read_selectolax_article
+        else:
+            soup = BeautifulSoup(content, HTML_PARSER, parse_only=_ARTICLE_STRAINER)
             articles = soup.find_all('div', class_='views-row')
-            
-            print(f"Found {len(articles)} articles with class 'views-row'")
-            
-            if not articles:
-                print("No articles found!")
-                return []
-            
-            for idx, article in enumerate(articles[:20], 1):
-                try:
-                    print(f"\nParsing article {idx}...")
-                    
-                    # Extract title from views-field-title
-                    title_div = article.find('div', class_='views-field-title')
-                    if not title_div:
-                        print(f"  No title div found for article {idx}")
-                        continue
-                    
-                    title_elem = title_div.find('a')
-                    if not title_elem:
-                        print(f"  No title link found for article {idx}")
-                        continue
-                    
-                    title = title_elem.get_text(strip=True)
-                    print(f"  Title: {title[:60]}...")
-                    
-                    # Extract link
-                    url = urljoin(USCIS_BASE_URL, title_elem['href'])
-                    print(f"  URL: {url}")
-                    
-                    # Extract date from time element
-                    date_div = article.find('div', class_='views-field-field-display-date')
-                    date_elem = date_div.find('time') if date_div else None
-                    date_str = date_elem.get('datetime') if date_elem else None
-                    print(f"  Date: {date_str}")
-                    
-                    # Filter for immigration-related content
-                    is_immigration = self._is_immigration_related(title)
-                    print(f"  Is immigration-related: {is_immigration}")
-                    
-                    if is_immigration:
-                        policies.append({
-                            'title': title,
-                            'url': url,
-                            'published_date': self._parse_date(date_str)
-                        })
-                        print(f"  ✓ Added to policies list!")
-                
-                except Exception as e:
-                    print(f"  Error parsing article {idx}: {str(e)}")
+            read_article = _read_soup_article
+        
+        if not articles:
+            self.logger.warning("No articles found on USCIS news page")
+            return []
+        
+        # Checked once so the per-article loop skips building debug fields
+        debug = self.logger.is_enabled_for(logging.DEBUG)
+        
+        for idx, article in enumerate(articles[:MAX_ARTICLES], 1):
+            try:
+                fields = read_article(article)
+                if fields is None:
+                    self.logger.debug("No title link found", article=idx)
                     continue
+                
+                title, href, date_str = fields
+                
+                # Extract link
+                url = urljoin(USCIS_BASE_URL, href)
+                
+                # Filter for immigration-related content
+                is_immigration = self._is_immigration_related(title)
+                if debug:
+                    self.logger.debug(
+                        "Parsed article",
+                        article=idx,
+                        title=title[:60],
+                        url=url,
+                        date=date_str,
+                        is_immigration=is_immigration
+                    )
+                
+                if is_immigration:
+                    policies.append({
+                        'title': title,
+                        'url': url,
+                        'published_date': self._parse_date(date_str)
+                    })
             
-            print(f"\n=== SCRAPING SUMMARY ===")
-            print(f"Total articles found: {len(articles)}")
-            print(f"Immigration-related policies: {len(policies)}")
-            
-            return policies
+            except Exception as e:
+                self.logger.warning("Error parsing article", article=idx, error=str(e))
+                continue
         
-        except Exception as e:
-            print(f"ERROR in scrape_news_page: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
-            raise
+        self.logger.info(
+            "USCIS news page scraped",
+            articles_found=len(articles),
+            immigration_policies=len(policies)
+        )
+        
+        return policies
+    
+    def _read_news_listing(self, response) -> bytes:
+        """
+        Read the news page body only as far as the articles that get parsed
+        
+        Rows are counted as chunks arrive; once the row after the last one
+        scraped starts, every needed row is complete and the rest of the page
+        (later rows, footer, scripts) is never downloaded. Both parsers
+        accept the truncated document.
+        """
+        content = bytearray()
+        scan_pos = 0
+        rows_seen = 0
+        try:
+            for chunk in response.iter_content(chunk_size=8192):
+                content += chunk
+                for match in _ROW_MARKER.finditer(content, scan_pos):
+                    rows_seen += 1
+                    scan_pos = match.end()
+                if rows_seen > MAX_ARTICLES:
+                    self.logger.debug("Stopped news page download early", bytes_read=len(content))
+                    break
+                # Back off a little so a marker split across chunks is still found
+                scan_pos = max(scan_pos, len(content) - _ROW_MARKER_OVERLAP)
+        except requests.RequestException as e:
+            raise USCISUnreachableError(f"Failed reading news page: {str(e)}")
+        finally:
+            response.close()
+        return bytes(content)
     
     def fetch_policy_content(self, url: str) -> str:
         """Fetch full content of a policy page"""
         try:
-            print(f"Fetching policy content from: {url}")
-            
-            response = self._make_request(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find main content
-            content_div = soup.find('div', class_='field-item') or soup.find('main') or soup.find('article')
-            
-            if not content_div:
-                print("Could not find content div")
-                return ""
-            
-            text = content_div.get_text(separator='\n', strip=True)
-            
-            print(f"Content fetched: {len(text)} characters")
+            text, _ = self._fetch_parsed(url, self._parse_policy_page)
             return text
         
         except Exception as e:
-            print(f"Error fetching content: {str(e)}")
+            self.logger.error("Error fetching content", error=e, url=url)
             return ""
     
+    def _parse_policy_page(self, response) -> str:
+        """Main text of a policy page response, or "" if it has no content block"""
+        soup = BeautifulSoup(response.content, HTML_PARSER)
+        
+        # Find main content
+        content_div = soup.find('div', class_='field-item') or soup.find('main') or soup.find('article')
+        
+        if not content_div:
+            self.logger.warning("Could not find content div", url=response.url)
+            return ""
+        
+        text = content_div.get_text(separator='\n', strip=True)
+        
+        self.logger.debug("Content fetched", url=response.url, length=len(text))
+        return text
+    
+    def fetch_policy_contents(self, urls: list) -> list:
+        """Fetch several policy pages concurrently, in the same order as urls"""
+        return list(_fetch_executor.map(self.fetch_policy_content, urls))
+    
     def _is_immigration_related(self, title: str) -> bool:
         """Check if title is immigration-related"""
-        keywords = [
-            'visa', 'immigration', 'opt', 'h-1b', 'f-1', 'stem',
-            'work authorization', 'ead', 'i-20', 'i-797', 'green card',
-            'petition', 'nonimmigrant', 'employment', 'temporary protected status',
-            'tps', 'asylum', 'refugee', 'naturalization', 'citizenship'
-        ]
-        title_lower = title.lower()
-        return any(kw in title_lower for kw in keywords)
+        return _is_immigration_title(title)
     
     def _parse_date(self, date_str: str) -> str:
         """Parse date string to ISO format"""
         if not date_str:
-            return datetime.utcnow().isoformat() + 'Z'
+            return _utc_now_iso()
+        
+        if 'T' in date_str:
+            return date_str
         
+        return _parse_display_date(date_str) or _utc_now_iso()
+
+
+def _read_selectolax_article(article):
+    """(title, href, datetime) of a selectolax views-row node, or None without a title link"""
+    title_elem = article.css_first('div.views-field-title a')
+    if title_elem is None:
+        return None
+    date_elem = article.css_first('div.views-field-field-display-date time')
+    return (
+        title_elem.text(strip=True),
+        title_elem.attributes['href'],
+        date_elem.attributes.get('datetime') if date_elem is not None else None
+    )
+
+
+def _read_soup_article(article):
+    """(title, href, datetime) of a BeautifulSoup views-row tag, or None without a title link"""
+    title_elem = _TITLE_LINK_SELECTOR.select_one(article)
+    if not title_elem:
+        return None
+    date_elem = _DATE_TIME_SELECTOR.select_one(article)
+    return (
+        title_elem.get_text(strip=True),
+        title_elem['href'],
+        date_elem.get('datetime') if date_elem else None
+    )
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff: uniform over [0, RETRY_DELAY * 2**attempt]"""
+    return random.uniform(0, RETRY_DELAY * (2 ** attempt))
+
+
+def _retry_after_seconds(value: str):
+    """Retry-After as seconds (delta or HTTP date), capped at RETRY_AFTER_MAX; None if absent or unparseable"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
         try:
-            if 'T' in date_str:
-                return date_str
-            
-            for fmt in ['%B %d, %Y', '%m/%d/%Y', '%Y-%m-%d']:
-                try:
-                    dt = datetime.strptime(date_str, fmt)
-                    return dt.isoformat() + 'Z'
-                except ValueError:
-                    continue
-            
-            return datetime.utcnow().isoformat() + 'Z'
-        except Exception:
-            return datetime.utcnow().isoformat() + 'Z'
\ No newline at end of file
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), RETRY_AFTER_MAX)
+
+
+def _conditional_headers(response_headers) -> dict:
+    """If-None-Match/If-Modified-Since headers built from a response's validators"""
+    headers = {}
+    if response_headers.get('ETag'):
+        headers['If-None-Match'] = response_headers['ETag']
+    if response_headers.get('Last-Modified'):
+        headers['If-Modified-Since'] = response_headers['Last-Modified']
+    return headers
+
+
+def _remember_result(url: str, headers: dict, result):
+    """Store a page's validators and parsed result for later conditional requests"""
+    with _conditional_cache_lock:
+        _conditional_cache.pop(url, None)
+        if len(_conditional_cache) >= CONDITIONAL_CACHE_MAX_SIZE:
+            del _conditional_cache[next(iter(_conditional_cache))]
+        _conditional_cache[url] = (headers, result)
+
+
+# Titles and display dates repeat across rescrapes in a warm container, so
+# both pure helpers are memoized; the utcnow() fallbacks stay uncached
+@lru_cache(maxsize=1024)
+def _is_immigration_title(title: str) -> bool:
+    """True when the title mentions any immigration keyword"""
+    return _IMMIGRATION_RE.search(title) is not None
+
+
+@lru_cache(maxsize=1024)
+def _parse_display_date(date_str: str):
+    """ISO form of a USCIS display date, or None if no known format matches"""
+    # The separator tells the formats apart, so only one strptime is tried
+    if '/' in date_str:
+        fmt = '%m/%d/%Y'
+    elif '-' in date_str:
+        fmt = '%Y-%m-%d'
+    else:
+        fmt = '%B %d, %Y'
+    try:
+        return datetime.strptime(date_str, fmt).isoformat() + 'Z'
+    except ValueError:
+        return None
+
+
+# (epoch second, ISO timestamp) - undated articles in one scrape share a stamp
+_utc_now_cache = (0, '')
+
+
+def _utc_now_iso() -> str:
+    """Current UTC time in ISO format, recomputed at most once per second"""
+    global _utc_now_cache
+    second = int(time.time())
+    if _utc_now_cache[0] != second:
+        _utc_now_cache = (second, datetime.utcnow().isoformat() + 'Z')
+    return _utc_now_cache[1]
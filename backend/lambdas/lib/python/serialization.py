@@ -0,0 +1,13 @@
+"""
+Response Serialization
+orjson hooks shared by the policy and document handlers
+"""
+
+from decimal import Decimal
+
+
+def json_default(obj):
+    """orjson default hook: DynamoDB Decimals as int/float, anything else as a string"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    return str(obj)
@@ -9,8 +9,51 @@ This module provides:
 - Personalized action items
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# Timelines only change when the calendar day does, so warm containers reuse
+# them per (class, program end date, day); oldest entry goes first when full
+TIMELINE_CACHE_MAX_SIZE = 4096
+_TIMELINE_CACHE = {}
+
+
+@dataclass(slots=True, frozen=True)
+class Timeline:
+    """Computed OPT timeline; immutable so one instance can back the cache."""
+    program_end_date: str
+    opt_window_opens: str
+    recommended_apply_by: str
+    last_day_to_apply: str
+    grace_period_ends: str
+    days_until_window: int
+    days_until_deadline: int
+    days_until_grace_end: int
+    status: str
+    urgency: str
+    status_message: str
+    action_items: Tuple[str, ...]
+    warnings: Tuple[Dict, ...]
+    
+    def to_dict(self) -> Dict:
+        """Fresh dict in the shape calculate_opt_timeline returns."""
+        # Explicit rather than dataclasses.asdict, which deep-copies recursively
+        return {
+            'program_end_date': self.program_end_date,
+            'opt_window_opens': self.opt_window_opens,
+            'recommended_apply_by': self.recommended_apply_by,
+            'last_day_to_apply': self.last_day_to_apply,
+            'grace_period_ends': self.grace_period_ends,
+            'days_until_window': self.days_until_window,
+            'days_until_deadline': self.days_until_deadline,
+            'days_until_grace_end': self.days_until_grace_end,
+            'status': self.status,
+            'urgency': self.urgency,
+            'status_message': self.status_message,
+            'action_items': list(self.action_items),
+            'warnings': [dict(w) for w in self.warnings]
+        }
 
 
 class TimelineCalculator:
@@ -59,16 +102,43 @@ class TimelineCalculator:
             >>> print(timeline['status'])  # 'in_window', 'before_window', etc.
         """
         
+        today = date.today()
+        if not isinstance(program_end_date, str):
+            # Only strings parse, and non-strings may not be hashable cache keys
+            return dict(cls._build_opt_timeline(program_end_date, today))
+        
+        # current_status does not feed into the calculation, so it is not part of the key
+        cache_key = (cls, program_end_date, today.toordinal())
+        timeline = _TIMELINE_CACHE.get(cache_key)
+        if timeline is None:
+            timeline = cls._build_opt_timeline(program_end_date, today)
+            if len(_TIMELINE_CACHE) >= TIMELINE_CACHE_MAX_SIZE:
+                del _TIMELINE_CACHE[next(iter(_TIMELINE_CACHE))]
+            _TIMELINE_CACHE[cache_key] = timeline
+        
+        # Hand out a fresh dict so callers can edit the result without touching the cache
+        if isinstance(timeline, Timeline):
+            return timeline.to_dict()
+        return dict(timeline)
+    
+    @classmethod
+    def _build_opt_timeline(cls, program_end_date: str, today: date):
+        """
+        Compute the timeline for calculate_opt_timeline as of today.
+        
+        Returns:
+            Timeline, or the error dict when the date does not parse
+        """
+        
         try:
-            end_date = datetime.fromisoformat(program_end_date)
+            # Everything here is day-granular, so plain dates are enough
+            end_date = date.fromisoformat(program_end_date)
         except (ValueError, TypeError):
             return {
                 'error': 'Invalid program end date format. Must be YYYY-MM-DD.',
                 'status': 'error'
             }
         
-        today = datetime.now()
-        
         # Calculate key dates
         opt_window_start = end_date - timedelta(days=cls.OPT_WINDOW_DAYS)
         recommended_apply_by = end_date - timedelta(days=cls.RECOMMENDED_BUFFER_DAYS)
@@ -82,13 +152,12 @@ class TimelineCalculator:
         
         # Determine status
         status_info = cls._determine_status(
-            today, 
-            opt_window_start, 
-            end_date, 
-            grace_period_end
+            days_until_window,
+            days_until_deadline,
+            days_until_grace_end
         )
         
-        # Build timeline object
+        # Fields the action items and warnings are derived from
         timeline = {
             'program_end_date': program_end_date,
             'opt_window_opens': opt_window_start.strftime('%Y-%m-%d'),
@@ -103,30 +172,29 @@ class TimelineCalculator:
             'status_message': status_info['message']
         }
         
-        # Add action items and warnings
-        timeline['action_items'] = cls._get_action_items(timeline)
-        timeline['warnings'] = cls._get_warnings(timeline)
-        
-        return timeline
+        return Timeline(
+            **timeline,
+            action_items=tuple(cls._get_action_items(timeline)),
+            warnings=tuple(cls._get_warnings(timeline))
+        )
     
     @classmethod
-    def _determine_status(cls, today: datetime, window_start: datetime, 
-                         end_date: datetime, grace_end: datetime) -> Dict:
+    def _determine_status(cls, days_until_window: int, days_until_deadline: int,
+                         days_until_grace_end: int) -> Dict:
         """
         Determine current OPT timeline status.
         
         Args:
-            today: Current date
-            window_start: OPT window open date
-            end_date: Program end date
-            grace_end: Grace period end date
+            days_until_window: Days from today until the OPT window opens
+            days_until_deadline: Days from today until the program end date
+            days_until_grace_end: Days from today until the grace period ends
         
         Returns:
             Dict with status, urgency, and message
         """
         
-        if today < window_start:
-            days_until = (window_start - today).days
+        if days_until_window > 0:
+            days_until = days_until_window
             
             if days_until > 120:
                 return {
@@ -141,8 +209,8 @@ class TimelineCalculator:
                     'message': f'Your OPT window opens in {days_until} days. Time to prepare!'
                 }
         
-        elif window_start <= today <= end_date:
-            days_remaining = (end_date - today).days
+        elif days_until_deadline >= 0:
+            days_remaining = days_until_deadline
             
             if days_remaining <= 7:
                 return {
@@ -163,8 +231,8 @@ class TimelineCalculator:
                     'message': f'Your OPT window is open. {days_remaining} days to apply.'
                 }
         
-        elif end_date < today <= grace_end:
-            days_remaining = (grace_end - today).days
+        elif days_until_grace_end >= 0:
+            days_remaining = days_until_grace_end
             
             return {
                 'status': 'grace_period',
@@ -172,107 +240,118 @@ class TimelineCalculator:
                 'message': f'You are in the 60-day grace period. {days_remaining} days remaining.'
             }
         
-        else:  # today > grace_end
+        else:  # grace period already over
             return {
                 'status': 'expired',
                 'urgency': 'critical',
                 'message': 'Grace period has ended. Immediate action required.'
             }
     
-    @classmethod
-    def _get_action_items(cls, timeline: Dict) -> List[str]:
-        """
-        Get recommended action items based on timeline status.
-        
-        Args:
-            timeline: Timeline dict with status and dates
-        
-        Returns:
-            List of actionable items
-        """
-        
-        status = timeline['status']
-        days_until_window = timeline['days_until_window']
-        days_until_deadline = timeline['days_until_deadline']
-        
+    # Fixed leading items per status; the trailing entries that mention dates
+    # or day counts are filled in from the timeline
+    _ACTION_ITEMS = {
         # Far before window (> 120 days)
-        if status == 'far_before_window':
-            return [
+        'far_before_window': (
+            (
                 'Review OPT eligibility requirements',
                 'Start saving for $410 USCIS filing fee',
                 'Familiarize yourself with I-765 form',
-                'Keep your passport valid (6+ months)',
-                f'OPT window opens in {days_until_window} days'
-            ]
-        
+                'Keep your passport valid (6+ months)'
+            ),
+            lambda t: [f'OPT window opens in {t["days_until_window"]} days']
+        ),
         # Before window (30-120 days)
-        elif status == 'before_window':
-            return [
+        'before_window': (
+            (
                 'Gather required documents (passport, I-20, transcripts)',
                 'Get passport photos taken (2" x 2", recent)',
                 'Download and review I-765 form',
                 'Prepare filing fee ($410 check or money order)',
-                'Schedule meeting with DSO for signature',
-                f'Window opens on {timeline["opt_window_opens"]}'
-            ]
-        
+                'Schedule meeting with DSO for signature'
+            ),
+            lambda t: [f'Window opens on {t["opt_window_opens"]}']
+        ),
         # In window - comfortable time
-        elif status == 'in_window':
-            return [
+        'in_window': (
+            (
                 'Complete I-765 application form',
                 'Get DSO signature on I-20 (page 3)',
                 'Make copies of all documents (2 sets)',
                 'Get check/money order for $410',
-                'Review USCIS mailing address',
-                f'Recommended to apply by {timeline["recommended_apply_by"]}',
-                f'{days_until_deadline} days remaining'
+                'Review USCIS mailing address'
+            ),
+            lambda t: [
+                f'Recommended to apply by {t["recommended_apply_by"]}',
+                f'{t["days_until_deadline"]} days remaining'
             ]
-        
+        ),
         # In window - urgent (< 30 days)
-        elif status == 'in_window_urgent':
-            return [
+        'in_window_urgent': (
+            (
                 '⚠️ URGENT: Apply as soon as possible',
                 'Complete I-765 form TODAY',
                 'Get DSO signature IMMEDIATELY',
                 'Prepare all documents and copies',
-                'Use certified mail with tracking',
-                f'Deadline: {timeline["last_day_to_apply"]} ({days_until_deadline} days)'
-            ]
-        
+                'Use certified mail with tracking'
+            ),
+            lambda t: [f'Deadline: {t["last_day_to_apply"]} ({t["days_until_deadline"]} days)']
+        ),
         # In window - critical (< 7 days)
-        elif status == 'in_window_critical':
-            return [
+        'in_window_critical': (
+            (
                 '🚨 CRITICAL: Apply IMMEDIATELY - express processing recommended',
                 'Complete I-765 RIGHT NOW',
                 'Visit DSO TODAY for signature',
                 'Use overnight/express mail',
-                'Document everything with photos/receipts',
-                f'FINAL DEADLINE: {timeline["last_day_to_apply"]}'
-            ]
-        
+                'Document everything with photos/receipts'
+            ),
+            lambda t: [f'FINAL DEADLINE: {t["last_day_to_apply"]}']
+        ),
         # Grace period
-        elif status == 'grace_period':
-            return [
+        'grace_period': (
+            (
                 '⚠️ You are in the 60-day grace period after graduation',
                 'If you applied for OPT: Track application status online',
                 'If you didn\'t apply: Consider other visa options (H-1B, transfer)',
                 'Cannot work until EAD card is received',
-                'Consult with DSO about your options',
-                f'Grace period ends: {timeline["grace_period_ends"]}'
-            ]
-        
+                'Consult with DSO about your options'
+            ),
+            lambda t: [f'Grace period ends: {t["grace_period_ends"]}']
+        ),
         # Expired
-        elif status == 'expired':
-            return [
+        'expired': (
+            (
                 '❌ Grace period has ended',
                 'You may be out of status',
                 'Contact immigration attorney IMMEDIATELY',
                 'Do NOT work without proper authorization',
                 'Discuss options with DSO and lawyer'
-            ]
+            ),
+            None
+        )
+    }
+    
+    @classmethod
+    def _get_action_items(cls, timeline: Dict) -> List[str]:
+        """
+        Get recommended action items based on timeline status.
+        
+        Args:
+            timeline: Timeline dict with status and dates
+        
+        Returns:
+            List of actionable items
+        """
         
-        else:
+        entry = cls._ACTION_ITEMS.get(timeline['status'])
+        if entry is None:
             return ['Contact your DSO for guidance']
+        
+        static_items, dynamic_items = entry
+        items = list(static_items)
+        if dynamic_items:
+            items += dynamic_items(timeline)
+        return items
     
     @classmethod
     def _get_warnings(cls, timeline: Dict) -> List[Dict]:
@@ -283,50 +362,20 @@ class TimelineCalculator:
             timeline: Timeline dict with status and dates
         
         Returns:
-            List of warning dicts with severity and message
+            List of warning dicts with severity and message; the dicts are
+            shared, so copy one before changing it
         """
         
         warnings = []
         
-        # Critical warnings for urgent situations
-        if timeline['urgency'] == 'critical':
-            if timeline['status'] == 'in_window_critical':
-                warnings.append({
-                    'severity': 'critical',
-                    'message': 'Less than 7 days to apply for OPT. Apply immediately to avoid missing the deadline.',
-                    'action': 'Visit your DSO today'
-                })
-            
-            elif timeline['status'] == 'expired':
-                warnings.append({
-                    'severity': 'critical',
-                    'message': 'Grace period has ended. You may be out of status and need immediate legal advice.',
-                    'action': 'Contact immigration attorney ASAP'
-                })
-        
-        # High priority warnings
-        elif timeline['urgency'] == 'high':
-            if timeline['status'] == 'in_window_urgent':
-                warnings.append({
-                    'severity': 'high',
-                    'message': 'Less than 30 days to apply. Start your application now to avoid issues.',
-                    'action': 'Begin I-765 application immediately'
-                })
-            
-            elif timeline['status'] == 'grace_period':
-                warnings.append({
-                    'severity': 'high',
-                    'message': 'You are in your 60-day grace period. Cannot work without EAD card.',
-                    'action': 'Track your OPT application status'
-                })
+        # Critical and high priority warnings for urgent situations
+        warning = _URGENCY_WARNINGS.get((timeline['urgency'], timeline['status']))
+        if warning:
+            warnings.append(warning)
         
         # General reminders
-        if timeline['status'] in ['in_window', 'in_window_urgent', 'in_window_critical']:
-            warnings.append({
-                'severity': 'info',
-                'message': 'USCIS processing typically takes 90-120 days. Apply early for peace of mind.',
-                'action': None
-            })
+        if timeline['status'] in _IN_WINDOW_STATUSES:
+            warnings.append(_PROCESSING_TIME_REMINDER)
         
         return warnings
     
@@ -342,16 +391,47 @@ class TimelineCalculator:
             Formatted status string
         """
         
-        status = timeline['status']
-        
-        status_messages = {
-            'far_before_window': '📅 Planning Phase',
-            'before_window': '⏰ Preparation Phase',
-            'in_window': '✅ Application Window Open',
-            'in_window_urgent': '⚠️ Deadline Approaching',
-            'in_window_critical': '🚨 URGENT - Apply Now',
-            'grace_period': '⏳ Grace Period',
-            'expired': '❌ Grace Period Ended'
-        }
-        
-        return status_messages.get(status, 'Unknown Status')
\ No newline at end of file
+        return _STATUS_LABELS.get(timeline['status'], 'Unknown Status')
+
+
+# Warning for each (urgency, status) pair that warrants one
+_URGENCY_WARNINGS = {
+    ('critical', 'in_window_critical'): {
+        'severity': 'critical',
+        'message': 'Less than 7 days to apply for OPT. Apply immediately to avoid missing the deadline.',
+        'action': 'Visit your DSO today'
+    },
+    ('critical', 'expired'): {
+        'severity': 'critical',
+        'message': 'Grace period has ended. You may be out of status and need immediate legal advice.',
+        'action': 'Contact immigration attorney ASAP'
+    },
+    ('high', 'in_window_urgent'): {
+        'severity': 'high',
+        'message': 'Less than 30 days to apply. Start your application now to avoid issues.',
+        'action': 'Begin I-765 application immediately'
+    },
+    ('high', 'grace_period'): {
+        'severity': 'high',
+        'message': 'You are in your 60-day grace period. Cannot work without EAD card.',
+        'action': 'Track your OPT application status'
+    }
+}
+
+_IN_WINDOW_STATUSES = frozenset(['in_window', 'in_window_urgent', 'in_window_critical'])
+
+_PROCESSING_TIME_REMINDER = {
+    'severity': 'info',
+    'message': 'USCIS processing typically takes 90-120 days. Apply early for peace of mind.',
+    'action': None
+}
+
+_STATUS_LABELS = {
+    'far_before_window': '📅 Planning Phase',
+    'before_window': '⏰ Preparation Phase',
+    'in_window': '✅ Application Window Open',
+    'in_window_urgent': '⚠️ Deadline Approaching',
+    'in_window_critical': '🚨 URGENT - Apply Now',
+    'grace_period': '⏳ Grace Period',
+    'expired': '❌ Grace Period Ended'
+}
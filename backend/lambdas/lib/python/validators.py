@@ -5,8 +5,23 @@ Input Validation Module
 import re
 from errors import ValidationError
 
-ALLOWED_VISA_TYPES = ['F-1', 'OPT', 'H-1B', 'L-1', 'O-1']
-ALLOWED_IMPACT_LEVELS = ['Critical', 'High', 'Medium', 'Low']
+ALLOWED_VISA_TYPES = frozenset(['F-1', 'OPT', 'H-1B', 'L-1', 'O-1'])
+ALLOWED_IMPACT_LEVELS = frozenset(['Critical', 'High', 'Medium', 'Low'])
+# Compact codes stored on user items in place of the full visa names
+VISA_TYPE_CODES = {'F-1': 'F', 'OPT': 'P', 'H-1B': 'H', 'L-1': 'L', 'O-1': 'O'}
+VISA_TYPES_BY_CODE = {code: visa for visa, code in VISA_TYPE_CODES.items()}
+# Canonical spelling by lowercase key. Policy items are stored with these
+# exact values so index key conditions and contains() filters match
+# without case-folding any row at read time
+_CANONICAL_VISA_TYPES = {visa.lower(): visa for visa in ALLOWED_VISA_TYPES}
+_CANONICAL_IMPACT_LEVELS = {level.lower(): level for level in ALLOWED_IMPACT_LEVELS}
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Characters sanitize_string strips. \w and \s are Unicode-aware, so the regex
+# stays for non-ASCII input; ASCII strings use a translate table derived from
+# it, which deletes the same characters in one C-level pass
+UNSAFE_CHARS_PATTERN = re.compile(r'[^\w\s\-.,;:!?()\[\]@#$%&*+=]')
+_ASCII_UNSAFE_TABLE = dict.fromkeys(c for c in range(128) if UNSAFE_CHARS_PATTERN.match(chr(c)))
 
 
 class Validators:
@@ -50,8 +65,9 @@ class Validators:
         if len(value) > max_length:
             raise ValidationError(f"String too long (max {max_length} chars)", field="string")
         # Remove dangerous characters
-        value = re.sub(r'[^\w\s\-.,;:!?()\[\]@#$%&*+=]', '', value)
-        return value
+        if value.isascii():
+            return value.translate(_ASCII_UNSAFE_TABLE)
+        return UNSAFE_CHARS_PATTERN.sub('', value)
     
     @staticmethod
     def validate_policy_data(policy: dict) -> dict:
@@ -62,17 +78,26 @@ class Validators:
         
         policy['title'] = Validators.sanitize_string(policy['title'], 500)
         policy['summary'] = Validators.sanitize_string(policy['summary'], 5000)
-        policy['impact_level'] = Validators.validate_impact_level(policy['impact_level'])
+        policy['impact_level'] = Validators.validate_impact_level(
+            _canonical_case(policy['impact_level'], _CANONICAL_IMPACT_LEVELS)
+        )
         
         if not isinstance(policy['affected_visas'], list):
             raise ValidationError("affected_visas must be a list", field="affected_visas")
         
-        validated_visas = []
-        for visa in policy['affected_visas']:
-            validated_visas.append(Validators.validate_visa_type(visa))
-        policy['affected_visas'] = validated_visas
+        policy['affected_visas'] = [
+            Validators.validate_visa_type(_canonical_case(visa, _CANONICAL_VISA_TYPES))
+            for visa in policy['affected_visas']
+        ]
         
         if 'action_items' in policy and not isinstance(policy['action_items'], list):
             raise ValidationError("action_items must be a list", field="action_items")
         
-        return policy
\ No newline at end of file
+        return policy
+
+
+def _canonical_case(value, canonical: dict):
+    """Canonical spelling of value if it matches one ignoring case, else value unchanged"""
+    if not isinstance(value, str):
+        return value
+    return canonical.get(value.strip().lower(), value)
@@ -3,44 +3,71 @@ Get Policies Lambda Function
 Retrieves and filters immigration policy updates
 """
 
-import json
-import boto3
 import os
-from datetime import datetime
-from decimal import Decimal
+import time
+from datetime import datetime, timezone
 
-# Initialize DynamoDB
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ.get('POLICIES_TABLE', 'immigration-policies'))
+import orjson
 
-# Allowed visa types for filtering
-ALLOWED_VISA_TYPES = ['F-1', 'OPT', 'H-1B', 'L-1', 'O-1']
+# Import directly - Lambda Layer adds /opt/python to path
+from errors import DatabaseError
+from logger import get_logger
+from dynamodb import PolicyRepository
+from serialization import json_default
 
-def decimal_to_native(obj):
-    """Convert DynamoDB Decimal types to native Python types"""
-    if isinstance(obj, list):
-        return [decimal_to_native(i) for i in obj]
-    elif isinstance(obj, dict):
-        return {k: decimal_to_native(v) for k, v in obj.items()}
-    elif isinstance(obj, Decimal):
-        if obj % 1 == 0:
-            return int(obj)
-        else:
-            return float(obj)
+# Module scope so warm invocations reuse the logger and the repository's
+# DynamoDB connections
+logger = get_logger(correlation_id='init')
+policy_repo = PolicyRepository(logger=logger)
+
+# Listings only change when the scraper runs, so warm containers serve
+# repeat filter combinations from memory for up to POLICIES_CACHE_TTL_SECONDS
+POLICIES_CACHE_MAX_SIZE = 64
+POLICIES_CACHE_TTL_SECONDS = 300
+_POLICIES_CACHE = {}  # (visa_type, impact_level, limit) -> (expires_at, policies)
+
+
+def _get_cached_policies(visa_type, impact_level, limit):
+    """Policies for these filters, from the container cache or DynamoDB"""
+    cache_key = (visa_type, impact_level, limit)
+    now = time.monotonic()
+    cached = _POLICIES_CACHE.get(cache_key)
+    if cached and cached[0] > now:
+        policies = cached[1]
     else:
-        return obj
+        policies = policy_repo.get_policies(
+            visa_type=visa_type,
+            impact_level=impact_level,
+            limit=limit
+        )
+        _POLICIES_CACHE.pop(cache_key, None)
+        if len(_POLICIES_CACHE) >= POLICIES_CACHE_MAX_SIZE:
+            del _POLICIES_CACHE[next(iter(_POLICIES_CACHE))]
+        _POLICIES_CACHE[cache_key] = (now + POLICIES_CACHE_TTL_SECONDS, policies)
+    # Copies - the handler stamps each policy before returning it
+    return [dict(p) for p in policies]
+
+# Allowed filter values, with their error messages built once
+ALLOWED_VISA_TYPES = frozenset(['F-1', 'OPT', 'H-1B', 'L-1', 'O-1'])
+ALLOWED_IMPACT_LEVELS = frozenset(['High', 'Medium', 'Low'])
+_VISA_TYPE_ERROR = 'Visa type must be one of: F-1, OPT, H-1B, L-1, O-1'
+_IMPACT_LEVEL_ERROR = 'Impact level must be one of: High, Medium, Low'
+
+# Shared by every response - API Gateway only reads it, so one dict is reused
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Requested-With',
+    'Access-Control-Allow-Methods': 'GET,OPTIONS',
+    'Content-Type': 'application/json'
+}
 
 def create_response(status_code, body):
     """Create standardized API response"""
     return {
         'statusCode': status_code,
-        'headers': {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Requested-With',
-            'Access-Control-Allow-Methods': 'GET,OPTIONS',
-            'Content-Type': 'application/json'
-        },
-        'body': json.dumps(decimal_to_native(body), default=str)
+        'headers': CORS_HEADERS,
+        # One C-level pass; Decimals are converted inline as they are reached
+        'body': orjson.dumps(body, default=json_default).decode()
     }
 
 def lambda_handler(event, context):
@@ -53,8 +80,8 @@ def lambda_handler(event, context):
     - impact_level: Filter by impact level (High, Medium, Low)
     """
     try:
-        # Log the request
-        print(f"Get policies request: {event.get('requestContext', {}).get('requestId', 'N/A')}")
+        # Tag this invocation's log lines; the repository shares the logger
+        logger.set_correlation_id(event.get('requestContext', {}).get('requestId', 'N/A'))
         
         # Get query parameters
         query_params = event.get('queryStringParameters') or {}
@@ -79,38 +106,27 @@ def lambda_handler(event, context):
                 'success': False,
                 'error': {
                     'code': 'INVALID_VISA_TYPE',
-                    'message': f'Visa type must be one of: {", ".join(ALLOWED_VISA_TYPES)}'
+                    'message': _VISA_TYPE_ERROR
                 }
             })
         
         # Validate impact level if provided
-        allowed_impact_levels = ['High', 'Medium', 'Low']
-        if impact_level and impact_level not in allowed_impact_levels:
+        if impact_level and impact_level not in ALLOWED_IMPACT_LEVELS:
             return create_response(400, {
                 'success': False,
                 'error': {
                     'code': 'INVALID_IMPACT_LEVEL',
-                    'message': f'Impact level must be one of: {", ".join(allowed_impact_levels)}'
+                    'message': _IMPACT_LEVEL_ERROR
                 }
             })
         
-        # Scan table (for MVP - will optimize with better access patterns later)
+        # Query the impact-level or status index - both come back newest
+        # first, with the visa filter applied in DynamoDB
         try:
-            response = table.scan(
-                Limit=100  # Get more than needed for filtering
-            )
-            policies = response.get('Items', [])
-            
-            # Continue scanning if there are more items (pagination)
-            while 'LastEvaluatedKey' in response and len(policies) < 100:
-                response = table.scan(
-                    Limit=100,
-                    ExclusiveStartKey=response['LastEvaluatedKey']
-                )
-                policies.extend(response.get('Items', []))
+            policies = _get_cached_policies(visa_type or None, impact_level or None, limit)
             
-        except Exception as e:
-            print(f"Error scanning policies table: {str(e)}")
+        except DatabaseError as e:
+            logger.error("Error querying policies table", error=e)
             return create_response(500, {
                 'success': False,
                 'error': {
@@ -119,38 +135,13 @@ def lambda_handler(event, context):
                 }
             })
         
-        # Filter by visa type if specified
-        if visa_type:
-            policies = [
-                p for p in policies
-                if visa_type in p.get('affected_visas', [])
-            ]
-        
-        # Filter by impact level if specified
-        if impact_level:
-            policies = [
-                p for p in policies
-                if p.get('impact_level', '').lower() == impact_level.lower()
-            ]
-        
-        # Sort by published date (newest first)
-        try:
-            policies.sort(
-                key=lambda x: x.get('published_date', ''),
-                reverse=True
-            )
-        except Exception as e:
-            print(f"Error sorting policies: {str(e)}")
-            # Continue with unsorted if sorting fails
-        
-        # Apply limit
-        policies = policies[:limit]
-        
-        # Add metadata to each policy
+        # Add metadata to each policy - one clock read and one string for the
+        # whole response
+        retrieved_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
         for policy in policies:
-            policy['retrieved_at'] = datetime.utcnow().isoformat() + 'Z'
+            policy['retrieved_at'] = retrieved_at
         
-        print(f"Returning {len(policies)} policies")
+        logger.debug(f"Returning {len(policies)} policies")
         
         return create_response(200, {
             'success': True,
@@ -174,7 +165,7 @@ def lambda_handler(event, context):
             }
         })
     except Exception as e:
-        print(f"Unexpected error in get_policies: {str(e)}")
+        logger.error("Unexpected error in get_policies", error=e)
         return create_response(500, {
             'success': False,
             'error': {
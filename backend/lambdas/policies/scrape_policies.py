@@ -3,19 +3,121 @@ Policy Scraper Lambda Function
 Scrapes USCIS, analyzes with Gemini AI, stores in DynamoDB
 """
 
-import json
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
 
 # Import directly - Lambda Layer adds /opt/python to path
 from errors import (
     USCISUnreachableError,
     AIError,
-    DuplicatePolicyError,
     DatabaseError
 )
 from logger import get_logger
 from scraper import USCISScraper
 from ai_client import AIClient
 from dynamodb import PolicyRepository
+from serialization import json_default
+
+# Built once per container and reused by warm invocations, so the Gemini
+# model, HTTP session and DynamoDB connections survive between runs
+logger = get_logger(correlation_id='init')
+scraper = USCISScraper(logger=logger)
+ai_client = AIClient(logger=logger)
+policy_repo = PolicyRepository(logger=logger)
+
+# Policies are analyzed side by side. Capped below the Gemini rate limit,
+# since every worker spends its time on an AI call
+PROCESS_MAX_WORKERS = 8
+_process_executor = ThreadPoolExecutor(max_workers=PROCESS_MAX_WORKERS)
+
+# Saved-policy summaries returned in the response body; the counters stay
+# exact past this, but the body stays far below Lambda's 6 MB payload limit
+RESULTS_POLICIES_MAX = 100
+
+
+def process_one(idx, policy, content, total):
+    """
+    Analyze one scraped policy, given its fetched page content
+    
+    Returns the counters this policy adds to the run results, plus the
+    item to save under 'policy_data' when the analysis succeeded
+    """
+    outcome = {}
+    try:
+        logger.debug(f"Processing policy {idx}/{total}", title=policy['title'], content_length=len(content))
+        
+        if not content:
+            content = policy['title']
+        
+        # Analyze with Gemini AI
+        try:
+            analysis = ai_client.analyze_policy(
+                title=policy['title'],
+                content=content
+            )
+            
+            outcome['analyzed'] = 1
+            logger.debug(
+                "AI analysis complete",
+                affected_visas=analysis['affected_visas'],
+                impact_level=analysis['impact_level']
+            )
+        
+        except AIError as e:
+            logger.error(f"AI analysis failed for policy {idx}", error=e)
+            outcome['errors'] = 1
+            return outcome
+        
+        # Prepare policy data
+        outcome['policy_data'] = {
+            'title': policy['title'],
+            'summary': analysis['summary'],
+            'impact_level': analysis['impact_level'],
+            'affected_visas': analysis['affected_visas'],
+            'action_items': analysis.get('action_items', []),
+            'source_url': policy['url'],
+            'raw_content': content[:5000],
+            'published_date': policy['published_date']
+        }
+    
+    except Exception as e:
+        logger.error(f"Unexpected error processing policy {idx}", error=e)
+        outcome['errors'] = outcome.get('errors', 0) + 1
+    
+    return outcome
+
+
+def save_analyzed(policies_data, results):
+    """
+    Save the analyzed policies in one batched write, skipping duplicates
+    
+    Counters and saved-policy summaries are added to results in the
+    order of policies_data
+    """
+    try:
+        policy_ids = policy_repo.save_policies(policies_data, check_duplicate=True)
+    
+    except DatabaseError as e:
+        logger.error("Database error saving policies", error=e)
+        results['errors'] += len(policies_data)
+        return
+    
+    for policy_data, policy_id in zip(policies_data, policy_ids):
+        if policy_id is None:
+            logger.info("Duplicate policy - skipping", title=policy_data['title'])
+            results['duplicates'] += 1
+            continue
+        
+        results['saved'] += 1
+        if len(results['policies']) >= RESULTS_POLICIES_MAX:
+            continue
+        results['policies'].append({
+            'policy_id': policy_id,
+            'title': policy_data['title'],
+            'impact_level': policy_data['impact_level']
+        })
+        logger.debug("Policy saved to database", policy_id=policy_id)
 
 
 def create_response(status_code, body):
@@ -25,29 +127,19 @@ def create_response(status_code, body):
         'headers': {
             'Content-Type': 'application/json'
         },
-        'body': json.dumps(body, default=str)
+        'body': orjson.dumps(body, default=json_default).decode()
     }
 
 
 def lambda_handler(event, context):
     """Main Lambda handler for policy scraping"""
     
-    print("=== LAMBDA HANDLER STARTED ===")
-    
-    # Initialize logger
+    # Tag this invocation's log lines; the components share the logger
     request_id = context.aws_request_id if context else 'local-test'
-    logger = get_logger(correlation_id=request_id)
+    logger.set_correlation_id(request_id)
     
-    print(f"Logger initialized with request_id: {request_id}")
     logger.info("=== Policy Scraper Lambda Started ===")
     
-    # Initialize components
-    print("Initializing scraper components...")
-    scraper = USCISScraper(logger=logger)
-    ai_client = AIClient(logger=logger)
-    policy_repo = PolicyRepository(logger=logger)
-    print("All components initialized!")
-    
     # Track results
     results = {
         'scraped': 0,
@@ -60,18 +152,15 @@ def lambda_handler(event, context):
     
     try:
         # Step 1: Scrape USCIS news page
-        print("Step 1: Starting USCIS scrape...")
-        logger.info("Step 1: Scraping USCIS news page")
+        logger.debug("Step 1: Scraping USCIS news page")
         
         try:
             policies = scraper.scrape_news_page()
             results['scraped'] = len(policies)
             
-            print(f"Scraped {len(policies)} policies from USCIS")
             logger.info(f"Scraped {len(policies)} policies from USCIS")
             
             if not policies:
-                print("No policies found - ending scrape")
                 logger.info("No policies found - ending scrape")
                 return create_response(200, {
                     'success': True,
@@ -80,7 +169,6 @@ def lambda_handler(event, context):
                 })
         
         except USCISUnreachableError as e:
-            print(f"USCIS website unreachable: {str(e)}")
             logger.error("USCIS website unreachable", error=e)
             return create_response(503, {
                 'success': False,
@@ -92,94 +180,52 @@ def lambda_handler(event, context):
             })
         
         # Step 2: Process each policy
-        print(f"Step 2: Processing {len(policies)} policies")
-        logger.info(f"Step 2: Processing {len(policies)} policies")
+        logger.debug(f"Step 2: Processing {len(policies)} policies")
         
-        for idx, policy in enumerate(policies[:10], 1):
-            try:
-                print(f"Processing policy {idx}: {policy['title'][:50]}...")
-                logger.info(f"Processing policy {idx}/{len(policies[:10])}", title=policy['title'])
-                
-                # Fetch full content
-                content = scraper.fetch_policy_content(policy['url'])
-                print(f"Fetched content length: {len(content)}")
-                
-                if not content:
-                    content = policy['title']
-                
-                # Analyze with Gemini AI
-                print("Calling Gemini AI for analysis...")
-                logger.info("Analyzing policy with Gemini AI")
-                
-                try:
-                    analysis = ai_client.analyze_policy(
-                        title=policy['title'],
-                        content=content
-                    )
-                    
-                    results['analyzed'] += 1
-                    print(f"AI analysis complete: {analysis['impact_level']}")
-                    
-                    logger.info(
-                        "AI analysis complete",
-                        affected_visas=analysis['affected_visas'],
-                        impact_level=analysis['impact_level']
-                    )
-                
-                except AIError as e:
-                    print(f"AI analysis failed: {str(e)}")
-                    logger.error(f"AI analysis failed for policy {idx}", error=e)
-                    results['errors'] += 1
-                    continue
-                
-                # Prepare policy data
-                policy_data = {
-                    'title': policy['title'],
-                    'summary': analysis['summary'],
-                    'impact_level': analysis['impact_level'],
-                    'affected_visas': analysis['affected_visas'],
-                    'action_items': analysis.get('action_items', []),
-                    'source_url': policy['url'],
-                    'raw_content': content[:5000],
-                    'published_date': policy['published_date']
-                }
-                
-                # Save to DynamoDB
-                print("Saving to DynamoDB...")
-                try:
-                    policy_id = policy_repo.save_policy(policy_data, check_duplicate=True)
-                    
-                    results['saved'] += 1
-                    results['policies'].append({
-                        'policy_id': policy_id,
-                        'title': policy['title'],
-                        'impact_level': analysis['impact_level']
-                    })
-                    
-                    print(f"Policy saved with ID: {policy_id}")
-                    logger.info("Policy saved to database", policy_id=policy_id)
-                
-                except DuplicatePolicyError:
-                    print("Duplicate policy - skipping")
-                    logger.info("Duplicate policy - skipping", title=policy['title'])
-                    results['duplicates'] += 1
-                    continue
-                
-                except DatabaseError as e:
-                    print(f"Database error: {str(e)}")
-                    logger.error(f"Database error for policy {idx}", error=e)
-                    results['errors'] += 1
-                    continue
-            
-            except Exception as e:
-                print(f"Unexpected error processing policy {idx}: {str(e)}")
-                logger.error(f"Unexpected error processing policy {idx}", error=e)
-                results['errors'] += 1
-                continue
+        # Titles already stored would be dropped at save time anyway, so
+        # they skip the page fetch and the Gemini call entirely
+        batch = policies[:10]
+        try:
+            existing = policy_repo.find_existing_titles(p['title'] for p in batch)
+        except DatabaseError as e:
+            # Without the check every stored policy would be saved again
+            logger.error("Duplicate check failed - ending scrape", error=e)
+            return create_response(500, {
+                'success': False,
+                'error': {
+                    'code': 'DATABASE_ERROR',
+                    'message': 'Could not check for existing policies'
+                },
+                'results': results
+            })
+        if existing:
+            results['duplicates'] += sum(1 for p in batch if p['title'] in existing)
+            batch = [p for p in batch if p['title'] not in existing]
+            logger.info("Skipping already stored policies", duplicates=results['duplicates'])
+        
+        # Every page is fetched at once over the shared session's pool, so
+        # the AI step starts with all content in hand
+        contents = scraper.fetch_policy_contents([p['url'] for p in batch])
+        
+        futures = [
+            _process_executor.submit(process_one, idx, policy, content, len(batch))
+            for idx, (policy, content) in enumerate(zip(batch, contents), 1)
+        ]
+        # Collected in submission order so results['policies'] keeps the
+        # scrape order; counters are merged here, so workers share no state
+        policies_data = []
+        for future in futures:
+            outcome = future.result()
+            for key in ('analyzed', 'errors'):
+                results[key] += outcome.get(key, 0)
+            if 'policy_data' in outcome:
+                policies_data.append(outcome['policy_data'])
+        
+        # Step 3: One batched write for everything that was analyzed
+        if policies_data:
+            save_analyzed(policies_data, results)
         
         # Final summary
-        print(f"=== SCRAPING COMPLETE ===")
-        print(f"Scraped: {results['scraped']}, Analyzed: {results['analyzed']}, Saved: {results['saved']}")
         logger.info(
             "=== Scraping Complete ===",
             scraped=results['scraped'],
@@ -196,9 +242,6 @@ def lambda_handler(event, context):
         })
     
     except Exception as e:
-        print(f"FATAL ERROR: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
         logger.error("Fatal error in scraper Lambda", error=e)
         return create_response(500, {
             'success': False,
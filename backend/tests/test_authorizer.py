@@ -0,0 +1,168 @@
+"""
+Tests for the hand-rolled HS256 verification in the JWT authorizer
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambdas', 'auth'))
+
+import authorizer  # noqa: E402
+
+
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def make_token(payload, alg='HS256', secret=None):
+    """Encode a JWT signed with HMAC-SHA256, whatever alg the header claims"""
+    header_segment = _b64url(json.dumps({'alg': alg, 'typ': 'JWT'}).encode())
+    payload_segment = _b64url(json.dumps(payload).encode())
+    signing_input = f"{header_segment}.{payload_segment}".encode()
+    key = secret if secret is not None else authorizer._JWT_SECRET_BYTES
+    signature = hmac.new(key, signing_input, hashlib.sha256).digest()
+    return f"{header_segment}.{payload_segment}.{_b64url(signature)}"
+
+
+def valid_payload(**overrides):
+    payload = {'user_id': 'user-1', 'email': 'user@example.com', 'exp': time.time() + 3600}
+    payload.update(overrides)
+    return payload
+
+
+class VerifyTokenTest(unittest.TestCase):
+
+    def test_valid_token(self):
+        payload = valid_payload()
+        decoded, error = authorizer.verify_token(make_token(payload))
+        self.assertIsNone(error)
+        self.assertEqual(decoded, payload)
+
+    def test_tampered_payload(self):
+        header, _, signature = make_token(valid_payload()).split('.')
+        forged = _b64url(json.dumps(valid_payload(user_id='admin')).encode())
+        decoded, error = authorizer.verify_token(f"{header}.{forged}.{signature}")
+        self.assertIsNone(decoded)
+        self.assertEqual(error, 'signature verification failed')
+
+    def test_tampered_signature(self):
+        header, payload, _ = make_token(valid_payload()).split('.')
+        forged = _b64url(hmac.new(b'wrong-secret', f"{header}.{payload}".encode(), hashlib.sha256).digest())
+        decoded, error = authorizer.verify_token(f"{header}.{payload}.{forged}")
+        self.assertIsNone(decoded)
+        self.assertEqual(error, 'signature verification failed')
+
+    def test_alg_none_rejected(self):
+        header = _b64url(json.dumps({'alg': 'none', 'typ': 'JWT'}).encode())
+        payload = _b64url(json.dumps(valid_payload()).encode())
+        decoded, error = authorizer.verify_token(f"{header}.{payload}.")
+        self.assertIsNone(decoded)
+        self.assertEqual(error, 'unsupported algorithm')
+
+    def test_alg_hs512_rejected(self):
+        decoded, error = authorizer.verify_token(make_token(valid_payload(), alg='HS512'))
+        self.assertIsNone(decoded)
+        self.assertEqual(error, 'unsupported algorithm')
+
+    def test_malformed_token(self):
+        for token in ('', 'abc', 'a.b', 'a.b.c.d', '!!!.???.***'):
+            with self.subTest(token=token):
+                self.assertEqual(authorizer.verify_token(token), (None, 'malformed token'))
+
+    def test_expired_token(self):
+        decoded, error = authorizer.verify_token(make_token(valid_payload(exp=time.time() - 1)))
+        self.assertIsNone(decoded)
+        self.assertEqual(error, 'expired')
+
+    def test_not_before_in_future(self):
+        decoded, error = authorizer.verify_token(make_token(valid_payload(nbf=time.time() + 60)))
+        self.assertIsNone(decoded)
+        self.assertEqual(error, 'token not yet valid')
+
+    def test_not_before_in_past(self):
+        decoded, error = authorizer.verify_token(make_token(valid_payload(nbf=time.time() - 60)))
+        self.assertIsNone(error)
+        self.assertEqual(decoded['user_id'], 'user-1')
+
+    def test_non_dict_payload(self):
+        for payload in (['user-1'], 'user-1', 42, None):
+            with self.subTest(payload=payload):
+                self.assertEqual(authorizer.verify_token(make_token(payload)), (None, 'malformed payload'))
+
+    def test_non_numeric_exp(self):
+        decoded, error = authorizer.verify_token(make_token(valid_payload(exp='9999999999')))
+        self.assertIsNone(decoded)
+        self.assertEqual(error, 'exp claim must be a number')
+
+
+class AuthorizeTokenCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        authorizer._TOKEN_CACHE.clear()
+
+    def tearDown(self):
+        authorizer._TOKEN_CACHE.clear()
+
+    def test_cache_hit_skips_verification(self):
+        token = make_token(valid_payload())
+        context, error = authorizer.authorize_token(token)
+        self.assertIsNone(error)
+        self.assertEqual(context, {'user_id': 'user-1', 'email': 'user@example.com'})
+
+        with mock.patch.object(authorizer, 'verify_token') as verify:
+            cached, error = authorizer.authorize_token(token)
+        verify.assert_not_called()
+        self.assertIsNone(error)
+        self.assertEqual(cached, context)
+        # Callers get a copy, so mutating it cannot poison the cache
+        cached['user_id'] = 'admin'
+        self.assertEqual(authorizer.authorize_token(token)[0]['user_id'], 'user-1')
+
+    def test_token_inside_expiry_margin_is_reverified(self):
+        exp = time.time() + authorizer.TOKEN_EXPIRY_MARGIN_SECONDS - 1
+        token = make_token(valid_payload(exp=exp))
+        self.assertIsNone(authorizer.authorize_token(token)[1])
+
+        with mock.patch.object(authorizer, 'verify_token', return_value=(None, 'expired')) as verify:
+            context, error = authorizer.authorize_token(token)
+        verify.assert_called_once_with(token)
+        self.assertIsNone(context)
+        self.assertEqual(error, 'expired')
+
+    def test_rejected_token_not_cached(self):
+        header, payload, _ = make_token(valid_payload()).split('.')
+        self.assertIsNotNone(authorizer.authorize_token(f"{header}.{payload}.AAAA")[1])
+        self.assertEqual(authorizer._TOKEN_CACHE, {})
+
+    def test_cache_evicts_oldest_when_full(self):
+        with mock.patch.object(authorizer, 'TOKEN_CACHE_MAX_SIZE', 2):
+            tokens = [make_token(valid_payload(user_id=f'user-{i}')) for i in range(3)]
+            for token in tokens:
+                authorizer.authorize_token(token)
+        self.assertEqual(len(authorizer._TOKEN_CACHE), 2)
+        self.assertNotIn(authorizer._token_fingerprint(tokens[0]), authorizer._TOKEN_CACHE)
+
+
+class BulkVerifyHandlerTest(unittest.TestCase):
+
+    def test_mixed_batch(self):
+        event = {'tokens': [make_token(valid_payload()), '', 123, {'token': 'x'}, 'a.b']}
+        results = authorizer.bulk_verify_handler(event, None)['results']
+        self.assertEqual(results, [
+            {'valid': True, 'user_id': 'user-1', 'email': 'user@example.com'},
+            {'valid': False, 'error': 'missing token'},
+            {'valid': False, 'error': 'malformed token'},
+            {'valid': False, 'error': 'malformed token'},
+            {'valid': False, 'error': 'malformed token'},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()